@@ -0,0 +1 @@
+"""Benchmarks of the IDS Hyyp integration."""
@@ -0,0 +1,355 @@
+"""End-to-end benchmarks of the IDS Hyyp integration against a fake cloud.
+
+Sets up the integration in a bare Home Assistant instance for accounts of
+increasing size and measures setup time, refresh latency, per-poll CPU and
+allocations, and command-to-state latency. Results can be saved and compared
+against a previous run to catch regressions:
+
+    python -m benchmarks.bench --save baseline.json
+    python -m benchmarks.bench --compare baseline.json
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+from functools import partial
+import json
+import logging
+import os
+from pathlib import Path
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any
+from unittest.mock import patch
+
+# Importing the loader before core is a circular import.
+from homeassistant.core import CoreState, HomeAssistant  # isort: split
+from homeassistant import bootstrap, loader
+from homeassistant.config_entries import ConfigEntries, ConfigEntry
+from homeassistant.const import CONF_TIMEOUT, CONF_TOKEN
+from homeassistant.helpers import entity_registry as er
+
+from custom_components.ids_hyyp.api import HyypAsyncClient
+from custom_components.ids_hyyp.const import (
+    CONF_PKG,
+    DATA_COORDINATOR,
+    DATA_REQUEST_GATES,
+    DOMAIN,
+    PKG_IDS_HYYP,
+)
+from custom_components.ids_hyyp.coordinator import HyypDataUpdateCoordinator
+from custom_components.ids_hyyp.limits import HyypRequestGate
+
+from .fake_cloud import TOKEN, FakeCloudConfig, FakeHyypCloud, async_start_fake_cloud
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+ACCOUNT = "benchmark@example.com"
+
+# (sites, partitions per site, zones per partition)
+DEFAULT_SIZES = ((1, 1, 8), (5, 2, 16), (20, 2, 25), (50, 4, 25))
+
+# Lower is better for every metric.
+METRICS = (
+    "setup_s",
+    "refresh_median_s",
+    "refresh_p95_s",
+    "poll_cpu_s",
+    "poll_alloc_kib",
+    "poll_alloc_blocks",
+    "command_optimistic_s",
+    "command_confirmed_s",
+)
+
+
+@asynccontextmanager
+async def async_hass() -> AsyncIterator[HomeAssistant]:
+    """Yield a running Home Assistant with this repository's integrations."""
+    with tempfile.TemporaryDirectory() as config_dir:
+        os.symlink(
+            REPO_ROOT / "custom_components", Path(config_dir) / "custom_components"
+        )
+        hass = HomeAssistant(config_dir)
+        hass.config.skip_pip = True
+        loader.async_setup(hass)
+        hass.config_entries = ConfigEntries(hass, {})
+        # Home Assistant 2024.1 has neither of the later helpers.
+        if hasattr(bootstrap, "async_load_base_functionality"):
+            await bootstrap.async_load_base_functionality(hass)
+            hass.set_state(CoreState.running)
+        else:
+            await bootstrap.load_registries(hass)
+            hass.state = CoreState.running
+
+        try:
+            yield hass
+        finally:
+            await hass.async_stop(force=True)
+
+
+def patch_base_url(base_url: str) -> Any:
+    """Return a patch pointing the clients the integration sets up at base_url."""
+    return patch(
+        "custom_components.ids_hyyp.HyypAsyncClient",
+        partial(HyypAsyncClient, base_url=base_url),
+    )
+
+
+async def _async_timed(call: Callable[[], Awaitable[Any]]) -> float:
+    """Return the wall time of call in seconds."""
+    start = time.perf_counter()
+    await call()
+    return time.perf_counter() - start
+
+
+async def async_wait_for(
+    hass: HomeAssistant, done: Callable[[], bool], timeout: float = 60
+) -> None:
+    """Wait until done returns True."""
+    async with asyncio.timeout(timeout):
+        while not done():
+            await asyncio.sleep(0.005)
+
+
+async def async_bench_size(
+    config: FakeCloudConfig, polls: int, commands: bool, rate_limit: bool
+) -> dict[str, Any]:
+    """Benchmark one account size, return the metrics."""
+    cloud, runner, base_url = await async_start_fake_cloud(config)
+    results: dict[str, Any] = {"zones": config.zones}
+
+    try:
+        async with async_hass() as hass:
+            entry = ConfigEntry(
+                version=1,
+                minor_version=1,
+                domain=DOMAIN,
+                title="benchmark",
+                data={CONF_TOKEN: TOKEN, CONF_PKG: PKG_IDS_HYYP},
+                source="user",
+                options={CONF_TIMEOUT: 120},
+                unique_id=ACCOUNT,
+            )
+
+            if not rate_limit:
+                # Polls run back to back, measure the integration, not the limit.
+                hass.data[DATA_REQUEST_GATES] = {
+                    PKG_IDS_HYYP: HyypRequestGate(rate=1e6, burst=10**6)
+                }
+            entry_id = entry.entry_id
+
+            async def async_setup() -> None:
+                # Adding an entry sets it up.
+                with patch_base_url(base_url):
+                    await hass.config_entries.async_add(entry)
+                    await hass.async_block_till_done()
+
+            results["setup_s"] = await _async_timed(async_setup)
+            results["entities"] = len(hass.states.async_entity_ids())
+
+            coordinator: HyypDataUpdateCoordinator = hass.data[DOMAIN][entry_id][
+                DATA_COORDINATOR
+            ]
+            await _async_bench_polls(hass, coordinator, cloud, polls, results)
+
+            if commands:
+                await _async_bench_command(hass, coordinator, results)
+
+            await hass.config_entries.async_unload(entry_id)
+    finally:
+        await runner.cleanup()
+
+    results["requests"] = sum(cloud.requests.values())
+    return results
+
+
+async def _async_bench_polls(
+    hass: HomeAssistant,
+    coordinator: HyypDataUpdateCoordinator,
+    cloud: FakeHyypCloud,
+    polls: int,
+    results: dict[str, Any],
+) -> None:
+    """Measure refresh latency, CPU time and allocations of polls."""
+    latencies = []
+    cpu_start = time.process_time()
+
+    for poll in range(polls):
+        # Change one zone per poll, so entity updates are part of the cost.
+        cloud.bypassed_zone_ids.symmetric_difference_update(
+            {poll % cloud.config.zones + 1}
+        )
+
+        async def async_refresh() -> None:
+            await coordinator.async_refresh()
+            await hass.async_block_till_done()
+
+        latencies.append(await _async_timed(async_refresh))
+
+    results["poll_cpu_s"] = (time.process_time() - cpu_start) / polls
+    results["refresh_median_s"] = statistics.median(latencies)
+    results["refresh_p95_s"] = (
+        statistics.quantiles(latencies, n=20)[-1]
+        if len(latencies) > 1
+        else latencies[0]
+    )
+
+    tracemalloc.start()
+    snapshot = tracemalloc.take_snapshot()
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+    stats = tracemalloc.take_snapshot().compare_to(snapshot, "filename")
+    tracemalloc.stop()
+
+    results["poll_alloc_kib"] = sum(stat.size_diff for stat in stats) / 1024
+    results["poll_alloc_blocks"] = sum(stat.count_diff for stat in stats)
+
+
+async def _async_bench_command(
+    hass: HomeAssistant,
+    coordinator: HyypDataUpdateCoordinator,
+    results: dict[str, Any],
+) -> None:
+    """Measure the time from an arm command to optimistic and confirmed state."""
+    registry = er.async_get(hass)
+    site_id, partition_id = next(iter(coordinator.data.partitions))
+    entity_id = registry.async_get_entity_id(
+        "alarm_control_panel", DOMAIN, f"{site_id}_{partition_id}"
+    )
+    assert entity_id
+
+    start = time.perf_counter()
+    await hass.services.async_call(
+        "alarm_control_panel",
+        "alarm_arm_away",
+        {"entity_id": entity_id, "code": "1234"},
+        blocking=True,
+    )
+    await async_wait_for(
+        hass,
+        lambda: (state := hass.states.get(entity_id)) is not None
+        and state.state == "armed_away",
+    )
+    results["command_optimistic_s"] = time.perf_counter() - start
+
+    await async_wait_for(hass, lambda: not coordinator._expectations)
+    results["command_confirmed_s"] = time.perf_counter() - start
+
+
+def _format_table(all_results: dict[str, dict[str, Any]]) -> str:
+    """Return results as a text table."""
+    columns = ["size", "zones", "entities", "requests", *METRICS]
+    rows = [columns] + [
+        [size]
+        + [
+            f"{value:.4g}" if isinstance(value, float) else str(value)
+            for value in (results.get(column, "-") for column in columns[1:])
+        ]
+        for size, results in all_results.items()
+    ]
+    widths = [max(len(row[index]) for row in rows) for index in range(len(columns))]
+
+    return "\n".join(
+        "  ".join(cell.rjust(width) for cell, width in zip(row, widths)) for row in rows
+    )
+
+
+def _compare(
+    baseline: dict[str, dict[str, Any]],
+    current: dict[str, dict[str, Any]],
+    tolerance: float,
+) -> list[str]:
+    """Return the metrics that regressed by more than tolerance."""
+    regressions = []
+
+    for size, results in current.items():
+        for metric in METRICS:
+            old, new = baseline.get(size, {}).get(metric), results.get(metric)
+            if old is None or new is None or old <= 0:
+                continue
+            if new > old * (1 + tolerance):
+                regressions.append(
+                    f"{size} {metric}: {old:.4g} -> {new:.4g} (+{new / old - 1:.0%})"
+                )
+
+    return regressions
+
+
+async def async_main(args: argparse.Namespace) -> int:
+    """Run the benchmarks."""
+    sizes = (
+        [tuple(int(part) for part in size.split("x")) for size in args.size]
+        if args.size
+        else DEFAULT_SIZES
+    )
+    all_results = {}
+
+    for sites, partitions, zones in sizes:
+        name = f"{sites}x{partitions}x{zones}"
+        print(f"Benchmarking {name}...", file=sys.stderr)
+        all_results[name] = await async_bench_size(
+            FakeCloudConfig(
+                sites=sites,
+                partitions_per_site=partitions,
+                zones_per_partition=zones,
+                latency=args.latency,
+                jitter=args.jitter,
+                error_rate=args.error_rate,
+            ),
+            args.polls,
+            not args.skip_commands,
+            args.rate_limit,
+        )
+
+    print(_format_table(all_results))
+
+    if args.save:
+        Path(args.save).write_text(json.dumps(all_results, indent=2))
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+        if regressions := _compare(baseline, all_results, args.tolerance):
+            print("Regressions:\n  " + "\n  ".join(regressions))
+            return 1
+        print("No regressions")
+
+    return 0
+
+
+def main() -> int:
+    """Parse arguments and run the benchmarks."""
+    parser = argparse.ArgumentParser(
+        description=__doc__.splitlines()[0],
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        "--size",
+        action="append",
+        help="account size as SITESxPARTITIONSxZONES, e.g. 1x1x8 (repeatable)",
+    )
+    parser.add_argument("--polls", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--skip-commands", action="store_true")
+    parser.add_argument(
+        "--rate-limit",
+        action="store_true",
+        help="keep the account request rate limit, off by default",
+    )
+    parser.add_argument("--save", help="write results as json")
+    parser.add_argument("--compare", help="fail on regressions against saved json")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    return asyncio.run(async_main(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,299 @@
+"""Local stand-in for the IDS Hyyp cloud api.
+
+Serves the endpoints used by the integration from generated account data, with
+configurable latency, error rate and account size. Commands change the served
+state like the real api does, so command-to-state latency can be measured.
+"""
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+import random
+import time
+from typing import Any
+
+from aiohttp import web
+
+# Endpoints relative to the api base url, see custom_components/ids_hyyp/api.py.
+LOGIN = "/auth/login"
+SYNC_INFO = "/device/getSyncInfo"
+STATE_INFO = "/device/getStateInfo"
+SITE_NOTIFICATIONS = "/device/getSiteNotifications"
+ARM_SITE = "/device/armSite"
+TRIGGER_ALARM = "/device/triggerAlarm"
+SET_ZONE_BYPASS = "/device/bypass"
+
+TOKEN = "fake-token"
+NOTIFICATIONS_PAGE = 10
+
+
+@dataclass
+class FakeCloudConfig:
+    """Account size and behaviour of the fake cloud."""
+
+    sites: int = 1
+    partitions_per_site: int = 1
+    zones_per_partition: int = 8
+    latency: float = 0.0
+    jitter: float = 0.0
+    error_rate: float = 0.0
+    # Seconds before a command shows up in state info, like panel round trips.
+    apply_delay: float = 0.0
+    seed: int = 0
+
+    @property
+    def zones(self) -> int:
+        """Return the number of zones of the account."""
+        return self.sites * self.partitions_per_site * self.zones_per_partition
+
+
+class FakeHyypCloud:
+    """Account data and request handlers of the fake cloud."""
+
+    def __init__(self, config: FakeCloudConfig) -> None:
+        """Generate the account."""
+        self.config = config
+        self.requests: dict[str, int] = {}
+        self._random = random.Random(config.seed)
+        self.sync_info: dict[str, Any] = {
+            "status": "SUCCESS",
+            "error": None,
+            "sites": [],
+            "partitions": [],
+            "zones": [],
+            "stayProfiles": [],
+        }
+        self.armed_partition_ids: set[int] = set()
+        self.armed_stay_profile_ids: set[int] = set()
+        self.bypassed_zone_ids: set[int] = set()
+        self.notifications: dict[int, list[dict[str, Any]]] = {}
+        # Accepted tokens, logins add one. None accepts any password.
+        self.tokens = {TOKEN}
+        self.password: str | None = None
+        self._partitions: dict[int, dict[str, Any]] = {}
+
+        partition_id = zone_id = stay_profile_id = 0
+        for site_id in range(1, config.sites + 1):
+            site = {
+                "id": site_id,
+                "name": f"Site {site_id}",
+                "isOnline": True,
+                "isMaster": True,
+                "hasPin": True,
+                "imei": f"35{site_id:013d}",
+                "partitionIds": [],
+            }
+            for _ in range(config.partitions_per_site):
+                partition_id += 1
+                stay_profile_id += 1
+                partition = {
+                    "id": partition_id,
+                    "name": f"Partition {partition_id}",
+                    "alarm": False,
+                    "zoneIds": [],
+                    "stayProfileIds": [stay_profile_id],
+                }
+                self.sync_info["stayProfiles"].append(
+                    {"id": stay_profile_id, "name": "Stay"}
+                )
+                for _ in range(config.zones_per_partition):
+                    zone_id += 1
+                    partition["zoneIds"].append(zone_id)
+                    self.sync_info["zones"].append(
+                        {"id": zone_id, "name": f"Zone {zone_id}"}
+                    )
+                site["partitionIds"].append(partition_id)
+                self.sync_info["partitions"].append(partition)
+                self._partitions[partition_id] = partition
+            self.sync_info["sites"].append(site)
+            self.notifications[site_id] = []
+            self.add_notice(site_id, 1)
+
+    def add_notice(self, site_id: int, event_number: int) -> None:
+        """Add a site notification, newest first."""
+        self.notifications[site_id].insert(
+            0, {"timestamp": int(time.time() * 1000), "eventNumber": event_number}
+        )
+
+    def state_info(self) -> dict[str, Any]:
+        """Return the state info body."""
+        return {
+            "status": "SUCCESS",
+            "error": None,
+            "armedPartitionIds": sorted(self.armed_partition_ids),
+            "armedStayProfileIds": sorted(self.armed_stay_profile_ids),
+            "bypassedZoneIds": sorted(self.bypassed_zone_ids),
+        }
+
+    def _apply_later(self, change: Any) -> None:
+        """Apply a command after the configured delay."""
+        if self.config.apply_delay:
+            asyncio.get_running_loop().call_later(self.config.apply_delay, change)
+        else:
+            change()
+
+    @web.middleware
+    async def middleware(self, request: web.Request, handler: Any) -> web.Response:
+        """Count requests, add latency and fail requests at the error rate."""
+        self.requests[request.path] = self.requests.get(request.path, 0) + 1
+
+        if delay := self.config.latency + self._random.uniform(0, self.config.jitter):
+            await asyncio.sleep(delay)
+
+        if self._random.random() < self.config.error_rate:
+            raise web.HTTPServiceUnavailable()
+
+        if request.path != LOGIN and request.query.get("token") not in self.tokens:
+            return web.json_response({"status": "FAILURE", "error": "Invalid token"})
+
+        return await handler(request)
+
+    def expire_tokens(self) -> None:
+        """Refuse every token handed out so far."""
+        self.tokens.clear()
+
+    async def login(self, request: web.Request) -> web.Response:
+        """Return a new token if the password is accepted."""
+        if self.password is not None and request.query.get("password") != self.password:
+            return web.json_response(
+                {"status": "FAILURE", "error": "Invalid email or password"}
+            )
+
+        token = f"{TOKEN}-{len(self.tokens)}-{time.monotonic_ns()}"
+        self.tokens.add(token)
+
+        return web.json_response({"status": "SUCCESS", "error": None, "token": token})
+
+    async def get_sync_info(self, request: web.Request) -> web.Response:
+        """Return sites, partitions, zones and stay profiles."""
+        return web.json_response(self.sync_info)
+
+    async def get_state_info(self, request: web.Request) -> web.Response:
+        """Return armed partitions and bypassed zones."""
+        return web.json_response(self.state_info())
+
+    async def get_site_notifications(self, request: web.Request) -> web.Response:
+        """Return a page of site notifications, older than timestamp if given."""
+        site_id = int(request.query["siteId"])
+        notifications = self.notifications.get(site_id, [])
+
+        if timestamp := request.query.get("timestamp"):
+            notifications = [
+                notification
+                for notification in notifications
+                if notification["timestamp"] < int(timestamp)
+            ]
+
+        return web.json_response(
+            {
+                "status": "SUCCESS",
+                "error": None,
+                "listSiteNotifications": {
+                    str(site_id): notifications[:NOTIFICATIONS_PAGE]
+                },
+            }
+        )
+
+    async def arm_site(self, request: web.Request) -> web.Response:
+        """Arm, stay arm or disarm a partition."""
+        partition_id = int(request.query["partitionId"])
+        arm = request.query["arm"] == "True"
+        stay_profile_id = int(request.query.get("stayProfileId") or 0)
+        partition = self._partitions[partition_id]
+
+        def change() -> None:
+            self.armed_stay_profile_ids.difference_update(partition["stayProfileIds"])
+            if arm:
+                self.armed_partition_ids.add(partition_id)
+                if stay_profile_id:
+                    self.armed_stay_profile_ids.add(stay_profile_id)
+            else:
+                self.armed_partition_ids.discard(partition_id)
+                partition["alarm"] = False
+
+        self._apply_later(change)
+        self.add_notice(int(request.query["siteId"]), 3 if arm else 4)
+
+        return web.json_response({"status": "SUCCESS", "error": None})
+
+    async def trigger_alarm(self, request: web.Request) -> web.Response:
+        """Trigger the alarm of a partition."""
+        partition = self._partitions[int(request.query["partitionId"])]
+        self._apply_later(lambda: partition.update(alarm=True))
+        self.add_notice(int(request.query["siteId"]), 1)
+
+        return web.json_response({"status": "SUCCESS", "error": None})
+
+    async def set_zone_bypass(self, request: web.Request) -> web.Response:
+        """Toggle the bypass of a zone."""
+        zone_id = int(request.query["zones"])
+        self._apply_later(
+            lambda: self.bypassed_zone_ids.symmetric_difference_update({zone_id})
+        )
+
+        return web.json_response({"status": "SUCCESS", "error": None})
+
+    def make_app(self) -> web.Application:
+        """Return the aiohttp application serving the api."""
+        app = web.Application(middlewares=[self.middleware])
+        app.router.add_get(LOGIN, self.login)
+        app.router.add_get(SYNC_INFO, self.get_sync_info)
+        app.router.add_get(STATE_INFO, self.get_state_info)
+        app.router.add_get(SITE_NOTIFICATIONS, self.get_site_notifications)
+        app.router.add_get(ARM_SITE, self.arm_site)
+        app.router.add_post(TRIGGER_ALARM, self.trigger_alarm)
+        app.router.add_get(SET_ZONE_BYPASS, self.set_zone_bypass)
+
+        return app
+
+
+async def async_start_fake_cloud(
+    config: FakeCloudConfig,
+) -> tuple[FakeHyypCloud, web.AppRunner, str]:
+    """Start a fake cloud on a free local port.
+
+    Returns the cloud, its runner to clean up and the api base url.
+    """
+    cloud = FakeHyypCloud(config)
+    runner = web.AppRunner(cloud.make_app(), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]  # type: ignore[union-attr]
+
+    return cloud, runner, f"http://127.0.0.1:{port}"
+
+
+async def _async_serve(config: FakeCloudConfig) -> None:
+    """Serve a fake cloud until interrupted."""
+    cloud, runner, base_url = await async_start_fake_cloud(config)
+    print(f"Fake IDS Hyyp cloud with {config.zones} zones on {base_url}")
+
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sites", type=int, default=1)
+    parser.add_argument("--partitions", type=int, default=1)
+    parser.add_argument("--zones", type=int, default=8, help="zones per partition")
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    asyncio.run(
+        _async_serve(
+            FakeCloudConfig(
+                sites=args.sites,
+                partitions_per_site=args.partitions,
+                zones_per_partition=args.zones,
+                latency=args.latency,
+                error_rate=args.error_rate,
+            )
+        )
+    )
@@ -0,0 +1,196 @@
+"""Replay a recorded IDS Hyyp cassette through the integration.
+
+Cassettes are recorded from a live account with the ids_hyyp.record_cassette
+service, or from the fake cloud with the record command. Replay sets the
+integration up in a bare Home Assistant, answers its requests from the
+cassette and reports refresh latency, CPU and allocations per poll:
+
+    python -m benchmarks.replay record --size 5x2x16 fake.cassette.gz
+    python -m benchmarks.replay replay fake.cassette.gz --speed 0
+    python -m benchmarks.replay replay ids_hyyp_...cassette.gz --profile out.prof
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import cProfile
+import logging
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Any
+from unittest.mock import patch
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_TIMEOUT, CONF_TOKEN
+
+from custom_components.ids_hyyp.cassette import (
+    HyypCassette,
+    HyypCassetteRecorder,
+    HyypReplayClient,
+)
+from custom_components.ids_hyyp.const import (
+    CONF_PKG,
+    DATA_COORDINATOR,
+    DOMAIN,
+    PKG_IDS_HYYP,
+)
+from custom_components.ids_hyyp.coordinator import HyypDataUpdateCoordinator
+
+from .bench import async_hass, patch_base_url
+from .fake_cloud import TOKEN, FakeCloudConfig, async_start_fake_cloud
+
+
+def _make_entry(data: dict[str, Any]) -> ConfigEntry:
+    """Return a config entry for the benchmark account."""
+    return ConfigEntry(
+        version=1,
+        minor_version=1,
+        domain=DOMAIN,
+        title="replay",
+        data={CONF_TOKEN: TOKEN, CONF_PKG: PKG_IDS_HYYP} | data,
+        source="user",
+        options={CONF_TIMEOUT: 120},
+        unique_id="replay@example.com",
+    )
+
+
+async def async_record(args: argparse.Namespace) -> int:
+    """Record polls of a fake cloud account to a cassette."""
+    sites, partitions, zones = (int(part) for part in args.size.split("x"))
+    cloud, runner, base_url = await async_start_fake_cloud(
+        FakeCloudConfig(
+            sites=sites,
+            partitions_per_site=partitions,
+            zones_per_partition=zones,
+            latency=args.latency,
+        )
+    )
+
+    try:
+        async with async_hass() as hass:
+            entry = _make_entry({})
+            with patch_base_url(base_url):
+                await hass.config_entries.async_add(entry)
+                await hass.async_block_till_done()
+
+            coordinator: HyypDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id][
+                DATA_COORDINATOR
+            ]
+            recorder = coordinator.hyyp_client.recorder = HyypCassetteRecorder()
+
+            for poll in range(args.polls):
+                cloud.bypassed_zone_ids.symmetric_difference_update(
+                    {poll % cloud.config.zones + 1}
+                )
+                await coordinator.async_refresh()
+                await hass.async_block_till_done()
+
+            coordinator.hyyp_client.recorder = None
+            await hass.config_entries.async_unload(entry.entry_id)
+    finally:
+        await runner.cleanup()
+
+    recorder.cassette.save(args.cassette)
+    print(f"Recorded {len(recorder.cassette.interactions)} requests")
+
+    return 0
+
+
+async def async_replay(args: argparse.Namespace) -> int:
+    """Replay a cassette and report the cost of each poll."""
+    cassette = HyypCassette.load(args.cassette)
+    starts = cassette.poll_starts()
+    polls = args.polls or max(len(starts), 1)
+    # Recorded gaps between polls, cycled like the recordings themselves.
+    gaps = [later - earlier for earlier, later in zip(starts, starts[1:])] or [0.0]
+    latencies = []
+
+    def make_client(*_: Any, pkg: str, **__: Any) -> HyypReplayClient:
+        return HyypReplayClient(cassette, pkg=pkg, speed=args.speed)
+
+    async with async_hass() as hass:
+        with patch("custom_components.ids_hyyp.HyypAsyncClient", make_client):
+            entry = _make_entry({})
+            await hass.config_entries.async_add(entry)
+            await hass.async_block_till_done()
+
+        coordinator: HyypDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id][
+            DATA_COORDINATOR
+        ]
+        profiler = cProfile.Profile() if args.profile else None
+        tracemalloc.start()
+        snapshot = tracemalloc.take_snapshot()
+        cpu_start = time.process_time()
+
+        for poll in range(polls):
+            if poll and args.speed:
+                await asyncio.sleep(gaps[(poll - 1) % len(gaps)] / args.speed)
+
+            if profiler:
+                profiler.enable()
+            start = time.perf_counter()
+            await coordinator.async_refresh()
+            await hass.async_block_till_done()
+            latencies.append(time.perf_counter() - start)
+            if profiler:
+                profiler.disable()
+
+        cpu = (time.process_time() - cpu_start) / polls
+        stats = tracemalloc.take_snapshot().compare_to(snapshot, "filename")
+        tracemalloc.stop()
+        entities = len(hass.states.async_entity_ids())
+        await hass.config_entries.async_unload(entry.entry_id)
+
+    if profiler:
+        profiler.dump_stats(args.profile)
+
+    print(f"{len(cassette.interactions)} recorded requests, {entities} entities")
+    print(f"polls                {polls}")
+    print(f"refresh median s     {statistics.median(latencies):.4g}")
+    print(f"refresh max s        {max(latencies):.4g}")
+    print(f"cpu per poll s       {cpu:.4g}")
+    allocated = sum(stat.size_diff for stat in stats) / 1024 / polls
+    print(f"alloc per poll KiB   {allocated:.4g}")
+
+    return 0
+
+
+def main() -> int:
+    """Parse arguments and record or replay."""
+    parser = argparse.ArgumentParser(
+        description=__doc__.splitlines()[0],
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    commands = parser.add_subparsers(required=True)
+
+    record = commands.add_parser("record", help="record a fake cloud account")
+    record.add_argument("cassette")
+    record.add_argument("--size", default="1x1x8", help="SITESxPARTITIONSxZONES")
+    record.add_argument("--polls", type=int, default=10)
+    record.add_argument("--latency", type=float, default=0.0)
+    record.set_defaults(run=async_record)
+
+    replay = commands.add_parser("replay", help="replay a cassette")
+    replay.add_argument("cassette")
+    replay.add_argument(
+        "--speed",
+        type=float,
+        default=1.0,
+        help="replay speed factor, 0 replays without any delay",
+    )
+    replay.add_argument(
+        "--polls", type=int, help="polls to replay, defaults to the recorded polls"
+    )
+    replay.add_argument("--profile", help="write cProfile stats of the polls")
+    replay.set_defaults(run=async_replay)
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    return asyncio.run(args.run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
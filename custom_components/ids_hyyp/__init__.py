@@ -2,22 +2,43 @@
 from __future__ import annotations
 
 import logging
-
-from pyhyypapi import HyypClient
+import time
+from typing import Any
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import CONF_TIMEOUT, CONF_TOKEN, Platform
-from homeassistant.core import HomeAssistant
+from homeassistant.const import (
+    CONF_EMAIL,
+    CONF_PASSWORD,
+    CONF_TIMEOUT,
+    CONF_TOKEN,
+    Platform,
+)
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.typing import ConfigType
 
+from .api import HyypAsyncClient
 from .const import (
     ATTR_ARM_CODE,
     ATTR_BYPASS_CODE,
+    CONF_CONNECT_TIMEOUT,
     CONF_PKG,
+    CONF_READ_TIMEOUT,
     DATA_COORDINATOR,
+    DATA_FLOW_INVENTORY,
+    DATA_WORKERS,
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_READ_TIMEOUT,
     DEFAULT_TIMEOUT,
     DOMAIN,
+    FLOW_INVENTORY_MAX_AGE,
 )
 from .coordinator import HyypDataUpdateCoordinator
+from .limits import async_get_request_gate
+from .services import async_setup_services
+from .storage import async_remove_entry_stores
+from .workers import HyypWorkerPool
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -28,6 +49,15 @@ PLATFORMS: list[Platform] = [
     Platform.SWITCH,
 ]
 
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Set up IDS Hyyp domain services."""
+    async_setup_services(hass)
+
+    return True
+
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up IDS Hyyp from a config entry."""
@@ -36,39 +66,102 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     if not entry.options:
         options = {
             CONF_TIMEOUT: DEFAULT_TIMEOUT,
+            CONF_CONNECT_TIMEOUT: DEFAULT_CONNECT_TIMEOUT,
+            CONF_READ_TIMEOUT: DEFAULT_READ_TIMEOUT,
             ATTR_ARM_CODE: None,
             ATTR_BYPASS_CODE: None,
         }
 
         hass.config_entries.async_update_entry(entry, options=options)
 
-    hyyp_client = HyypClient(token=entry.data[CONF_TOKEN], pkg=entry.data[CONF_PKG])
+    hyyp_client = HyypAsyncClient(
+        async_get_clientsession(hass),
+        token=entry.data[CONF_TOKEN],
+        pkg=entry.data[CONF_PKG],
+        # Entries created before credentials were stored renew through reauth.
+        email=entry.data.get(CONF_EMAIL),
+        password=entry.data.get(CONF_PASSWORD),
+        # Entries of the same package share one rate limit and in-flight reads.
+        gate=async_get_request_gate(hass, entry),
+    )
+
+    # Blocking jobs of the entry run on its own threads, not the shared executor.
+    workers = HyypWorkerPool(hass, entry.entry_id)
 
     coordinator = HyypDataUpdateCoordinator(
-        hass, api=hyyp_client, api_timeout=entry.options[CONF_TIMEOUT]
+        hass,
+        api=hyyp_client,
+        entry_id=entry.entry_id,
+        options=entry.options,
+        workers=workers,
     )
 
-    hass.data[DOMAIN][entry.entry_id] = {DATA_COORDINATOR: coordinator}
+    hass.data[DOMAIN][entry.entry_id] = {
+        DATA_COORDINATOR: coordinator,
+        DATA_WORKERS: workers,
+    }
 
-    await coordinator.async_config_entry_first_refresh()
+    await coordinator.history.async_load()
+
+    # A new entry starts from the inventory its config flow just fetched.
+    # Otherwise build entities from the cached snapshot if there is one and
+    # refresh in the background, so startup doesn't wait on the cloud.
+    cached = False
+    if inventory := _async_pop_flow_inventory(hass, entry):
+        coordinator.async_set_inventory(*inventory)
+    elif not (cached := await coordinator.async_load_cache()):
+        await coordinator.async_config_entry_first_refresh()
 
     entry.async_on_unload(entry.add_update_listener(_async_update_listener))
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
+    if cached:
+        entry.async_create_background_task(
+            hass, coordinator.async_refresh(), f"{DOMAIN} first refresh"
+        )
+
     return True
 
 
+@callback
+def _async_pop_flow_inventory(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> tuple[dict[Any, Any], dict[Any, list[Any]]] | None:
+    """Return the sites and notifications fetched by the entry's config flow."""
+    inventories = hass.data.get(DATA_FLOW_INVENTORY, {})
+
+    if (inventory := inventories.pop(entry.unique_id, None)) is None:
+        return None
+
+    fetched, sites, notifications = inventory
+    if time.monotonic() - fetched > FLOW_INVENTORY_MAX_AGE:
+        return None
+
+    return sites, notifications
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
 
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
     if unload_ok:
-        hass.data[DOMAIN].pop(entry.entry_id)
+        entry_data = hass.data[DOMAIN].pop(entry.entry_id)
+        await entry_data[DATA_COORDINATOR].async_save_storage()
+        entry_data[DATA_WORKERS].shutdown()
 
     return unload_ok
 
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the cached snapshot and notice history of a removed config entry."""
+    await async_remove_entry_stores(hass, entry.entry_id)
+
+
 async def _async_update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None:
-    """Handle options update."""
-    await hass.config_entries.async_reload(entry.entry_id)
+    """Apply updated options and credentials to the running coordinator."""
+    coordinator: HyypDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id][
+        DATA_COORDINATOR
+    ]
+    coordinator.async_apply_credentials(entry.data)
+    coordinator.async_apply_options(entry.options)
@@ -1,6 +1,10 @@
 """Support for IDS Hyyp alarms."""
 from __future__ import annotations
 
+from collections.abc import Iterable
+from functools import partial
+from typing import Any
+
 from pyhyypapi.exceptions import HTTPError, HyypApiError
 
 from homeassistant.components.alarm_control_panel import (
@@ -15,13 +19,14 @@ from homeassistant.const import (
     STATE_ALARM_DISARMED,
     STATE_ALARM_TRIGGERED,
 )
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.typing import StateType
 
-from .const import ATTR_ARM_CODE, DATA_COORDINATOR, DOMAIN
+from .const import DATA_COORDINATOR, DOMAIN, STATUS_SUPERSEDED
 from .coordinator import HyypDataUpdateCoordinator
 from .entity import HyypPartitionEntity
+from .resilience import HyypCircuitOpenError
 
 
 async def async_setup_entry(
@@ -31,14 +36,20 @@ async def async_setup_entry(
     coordinator: HyypDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id][
         DATA_COORDINATOR
     ]
-    arm_code = entry.options.get(ATTR_ARM_CODE)
-
-    async_add_entities(
-        [
-            HyypAlarm(coordinator, site_id, partition_id, arm_code)
-            for site_id in coordinator.data
-            for partition_id in coordinator.data[site_id]["partitions"]
-        ]
+
+    @callback
+    def _async_add_partitions(partition_keys: Iterable[tuple[Any, Any]]) -> None:
+        """Add alarm control panels for partitions."""
+        async_add_entities(
+            [
+                HyypAlarm(coordinator, site_id, partition_id)
+                for site_id, partition_id in partition_keys
+            ]
+        )
+
+    _async_add_partitions(coordinator.data.partitions)
+    entry.async_on_unload(
+        coordinator.async_add_key_listener("partitions", _async_add_partitions)
     )
 
 
@@ -58,34 +69,38 @@ class HyypAlarm(HyypPartitionEntity, AlarmControlPanelEntity):
         coordinator: HyypDataUpdateCoordinator,
         site_id: int,
         partition_id: int,
-        arm_code: str | None,
     ) -> None:
         """Initialize the sensor."""
         super().__init__(coordinator, site_id, partition_id)
-        self._attr_name = self.partition_data["name"]
-        self._arm_code = arm_code
+        self._attr_name = self.partition_data.name
         self._attr_unique_id = f"{self._site_id}_{partition_id}"
-        self._attr_code_arm_required = bool(arm_code)
         self._arm_home_profile_id = (
-            (list(self.partition_data["stayProfiles"])[0])
-            if self.partition_data["stayProfiles"]
+            self.partition_data.stay_profile_ids[0]
+            if self.partition_data.stay_profile_ids
             else 0
         )  # Supports multiple stay profiles. Assume first is arm home.
 
+    @property
+    def code_arm_required(self) -> bool:
+        """Return if a code is required to arm."""
+        return bool(self.coordinator.arm_code)
+
     @property
     def available(self) -> bool:
         """Check if device is reporting online from api."""
-        return bool(self.data["isOnline"])
+        return super().available and bool(self.data.is_online)
 
     @property
     def state(self) -> StateType:
         """Update alarm state."""
 
-        if self.partition_data["alarm"]:
+        partition = self.partition_data
+
+        if partition.alarm:
             return STATE_ALARM_TRIGGERED
 
-        if self.partition_data["armed"]:
-            if self.partition_data["stayArmed"]:
+        if partition.armed:
+            if partition.stay_armed:
                 return STATE_ALARM_ARMED_HOME
 
             return STATE_ALARM_ARMED_AWAY
@@ -94,90 +109,85 @@ class HyypAlarm(HyypPartitionEntity, AlarmControlPanelEntity):
 
     async def async_alarm_disarm(self, code: str | None = None) -> None:
         """Send disarm command."""
-        _code = code if not bool(self._arm_code) else self._arm_code
-
         try:
-            update_ok = await self.hass.async_add_executor_job(
-                self.coordinator.hyyp_client.arm_site,
+            update_ok = await self.coordinator.async_arm_partition(
                 self._site_id,
-                False,
-                _code,
                 self._partition_id,
+                arm=False,
+                code=self.coordinator.arm_code or code,
             )
 
+        except HyypCircuitOpenError:
+            raise
+
         except (HTTPError, HyypApiError) as err:
             raise HyypApiError("Cannot disarm alarm") from err
 
-        if update_ok["status"] == "SUCCESS":
-            await self.coordinator.async_request_refresh()
-
-        else:
+        if update_ok["status"] not in ("SUCCESS", STATUS_SUPERSEDED):
             raise HTTPError(f"Cannot disarm alarm: {update_ok}")
 
     async def async_alarm_arm_away(self, code: str | None = None) -> None:
         """Send arm away command."""
-        _code = code if not bool(self._arm_code) else self._arm_code
-
         try:
-            update_ok = await self.hass.async_add_executor_job(
-                self.coordinator.hyyp_client.arm_site,
+            update_ok = await self.coordinator.async_arm_partition(
                 self._site_id,
-                True,
-                _code,
                 self._partition_id,
+                arm=True,
+                code=self.coordinator.arm_code or code,
             )
 
+        except HyypCircuitOpenError:
+            raise
+
         except (HTTPError, HyypApiError) as err:
             raise HyypApiError("Cannot arm alarm") from err
 
-        if update_ok["status"] == "SUCCESS":
-            await self.coordinator.async_request_refresh()
-
-        else:
+        if update_ok["status"] not in ("SUCCESS", STATUS_SUPERSEDED):
             raise HTTPError(f"Cannot arm alarm, check for violated zones. {update_ok}")
 
     async def async_alarm_arm_home(self, code: str | None = None) -> None:
         """Send arm home command."""
-        _code = code if not bool(self._arm_code) else self._arm_code
-
         try:
-            update_ok = await self.hass.async_add_executor_job(
-                self.coordinator.hyyp_client.arm_site,
+            update_ok = await self.coordinator.async_arm_partition(
                 self._site_id,
-                True,
-                _code,
                 self._partition_id,
-                self._arm_home_profile_id,
+                arm=True,
+                code=self.coordinator.arm_code or code,
+                stay_profile_id=self._arm_home_profile_id,
             )
 
+        except HyypCircuitOpenError:
+            raise
+
         except (HTTPError, HyypApiError) as err:
             raise HyypApiError("Cannot arm home alarm") from err
 
-        if update_ok["status"] == "SUCCESS":
-            await self.coordinator.async_request_refresh()
-
-        else:
+        if update_ok["status"] not in ("SUCCESS", STATUS_SUPERSEDED):
             raise HTTPError(
                 f"Cannot arm home alarm, check for violated zones. {update_ok}"
             )
 
     async def async_alarm_trigger(self, code: str | None = None) -> None:
         """Send alarm trigger."""
-        _code = code if not bool(self._arm_code) else self._arm_code
+        _code = self.coordinator.arm_code or code
 
         try:
-            update_ok = await self.hass.async_add_executor_job(
-                self.coordinator.hyyp_client.trigger_alarm,
+            update_ok = await self.coordinator.async_send_command(
                 self._site_id,
-                _code,
-                self._partition_id,
+                partial(
+                    self.coordinator.hyyp_client.trigger_alarm,
+                    self._site_id,
+                    _code,
+                    self._partition_id,
+                ),
+                refresh=True,
             )
 
+        except HyypCircuitOpenError:
+            raise
+
         except (HTTPError, HyypApiError) as err:
             raise HyypApiError("Cannot trigger alarm") from err
 
-        if update_ok["status"] == "SUCCESS":
-            await self.coordinator.async_request_refresh()
-
-        else:
+        if update_ok["status"] != "SUCCESS":
             raise HTTPError(f"Cannot trigger alarm. {update_ok}")
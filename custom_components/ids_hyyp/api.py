@@ -0,0 +1,470 @@
+"""Asyncio IDS Hyyp cloud client running on Home Assistant's aiohttp session."""
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime
+from functools import partial
+from http import HTTPStatus
+import json
+import logging
+import time
+from typing import TYPE_CHECKING, Any
+
+import aiohttp
+from pyhyypapi.constants import (
+    DEFAULT_TIMEOUT,
+    REQUEST_HEADER,
+    STD_PARAMS,
+    EventNumber,
+)
+from pyhyypapi.exceptions import HTTPError, HyypApiError, InvalidURL
+
+if TYPE_CHECKING:
+    from .cassette import HyypCassetteRecorder
+    from .limits import HyypRequestGate
+    from .telemetry import HyypTelemetry
+
+_LOGGER = logging.getLogger(__name__)
+
+BASE_URL = "https://ids.trintel.co.za/Inhep-Impl-1.0-SNAPSHOT"
+API_ENDPOINT_LOGIN = "/auth/login"
+API_ENDPOINT_GET_SITE_NOTIFICATIONS = "/device/getSiteNotifications"
+API_ENDPOINT_SYNC_INFO = "/device/getSyncInfo"
+API_ENDPOINT_STATE_INFO = "/device/getStateInfo"
+API_ENDPOINT_ARM_SITE = "/device/armSite"
+API_ENDPOINT_TRIGGER_ALARM = "/device/triggerAlarm"
+API_ENDPOINT_SET_ZONE_BYPASS = "/device/bypass"
+
+# Api errors that mean the token is no longer accepted, matched in lower case.
+TOKEN_ERRORS = ("token", "unauthorized", "not logged in", "session expired")
+
+# Read only requests that concurrent callers may share.
+SHARED_ENDPOINTS = frozenset(
+    {
+        API_ENDPOINT_GET_SITE_NOTIFICATIONS,
+        API_ENDPOINT_SYNC_INFO,
+        API_ENDPOINT_STATE_INFO,
+    }
+)
+
+
+class HyypAuthError(HyypApiError):
+    """Token refused by the api and no working credentials to renew it."""
+
+
+def _is_token_error(error: Any) -> bool:
+    """Return True if an api error means the token was refused."""
+    return any(text in str(error).lower() for text in TOKEN_ERRORS)
+
+
+def build_client_timeout(
+    total: float, connect: float, read: float
+) -> aiohttp.ClientTimeout:
+    """Return request timeouts with separate connect and read budgets."""
+    return aiohttp.ClientTimeout(total=total, sock_connect=connect, sock_read=read)
+
+
+class HyypAsyncClient:
+    """Non-blocking IDS Hyyp api client.
+
+    Mirrors the calls of the synchronous ``pyhyypapi.HyypClient`` used by this
+    integration, but issues them on the event loop through a shared, pooled
+    aiohttp session instead of a requests session in an executor thread.
+
+    With credentials, a token the api refuses is renewed by logging in again,
+    once for all concurrent callers, and the request is retried.
+
+    With a gate, requests are rate limited per package and identical
+    concurrent read requests share one round trip. With a recorder, every
+    request and its response are recorded to a cassette, with telemetry
+    their latency, size and failures are counted.
+    """
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        *,
+        pkg: str,
+        token: str | None = None,
+        email: str | None = None,
+        password: str | None = None,
+        timeout: aiohttp.ClientTimeout | None = None,
+        gate: HyypRequestGate | None = None,
+        base_url: str = BASE_URL,
+    ) -> None:
+        """Initialize the client object."""
+        self._session = session
+        self._base_url = base_url
+        self._gate = gate
+        self.recorder: HyypCassetteRecorder | None = None
+        self.telemetry: HyypTelemetry | None = None
+        self.timeout = timeout or aiohttp.ClientTimeout(total=DEFAULT_TIMEOUT)
+        self._email = email
+        self._password = password
+        self._login_task: asyncio.Task[dict[Any, Any]] | None = None
+        self._params: dict[str, Any] = STD_PARAMS.copy()
+        self._params["pkg"] = pkg
+        self._params["token"] = token
+
+    @property
+    def token(self) -> str | None:
+        """Return the current api token."""
+        return self._params["token"]
+
+    def set_credentials(
+        self, email: str | None, password: str | None, token: str | None
+    ) -> bool:
+        """Use new credentials and token, return True if anything changed."""
+        if (email, password, token) == (self._email, self._password, self.token):
+            return False
+
+        self._email = email
+        self._password = password
+        self._params["token"] = token
+
+        return True
+
+    async def async_renew_token(self, refused_token: str | None) -> None:
+        """Log in again, unless the refused token was renewed already.
+
+        Concurrent callers share one login. Raises HyypAuthError if there
+        are no credentials or the api refuses them.
+        """
+        if self.token != refused_token:
+            return
+
+        if not (self._email and self._password):
+            raise HyypAuthError("Token refused and no credentials to renew it")
+
+        if self._login_task is None:
+            self._login_task = asyncio.get_running_loop().create_task(self.login())
+            self._login_task.add_done_callback(self._login_done)
+
+        try:
+            await asyncio.shield(self._login_task)
+
+        except (asyncio.TimeoutError, HTTPError, InvalidURL):
+            raise
+
+        except HyypApiError as err:
+            raise HyypAuthError(f"Token renewal failed: {err}") from err
+
+    def _login_done(self, task: asyncio.Task[dict[Any, Any]]) -> None:
+        """Forget a finished login."""
+        self._login_task = None
+
+        # Retrieve the exception in case every caller gave up on the login.
+        if not task.cancelled():
+            task.exception()
+
+    async def _request(
+        self, method: str, endpoint: str, params: dict[str, Any] | None = None
+    ) -> dict[Any, Any]:
+        """Send a request to the api and return the decoded json body.
+
+        A request refused for its token is retried once after renewal.
+        """
+        token = self.token
+
+        try:
+            return await self._request_once(method, endpoint, params)
+
+        except HyypAuthError:
+            if endpoint == API_ENDPOINT_LOGIN:
+                raise
+
+        _LOGGER.debug("Renewing the api token after %s was refused", endpoint)
+        await self.async_renew_token(token)
+
+        return await self._request_once(method, endpoint, params)
+
+    async def _request_once(
+        self, method: str, endpoint: str, params: dict[str, Any] | None = None
+    ) -> dict[Any, Any]:
+        """Send a request to the api once and return the decoded json body."""
+        _params = self._params.copy()
+        if params:
+            _params.update(params)
+
+        # aiohttp refuses None and bool query values, requests drops and
+        # stringifies them respectively. Keep the wire format identical.
+        _query = {
+            key: str(value) for key, value in _params.items() if value is not None
+        }
+
+        if self._gate is not None and endpoint in SHARED_ENDPOINTS:
+            # Share the response body, each caller decodes its own copy.
+            _text = await self._gate.run(
+                (method, endpoint, tuple(sorted(_query.items()))),
+                partial(self._send, method, endpoint, _query),
+            )
+        else:
+            _text = await self._send(method, endpoint, _query)
+
+        try:
+            _json_result: dict[Any, Any] = json.loads(_text)
+
+        except ValueError as err:
+            error = HyypApiError(
+                f"Impossible to decode response: {err}\nResponse was: {_text}"
+            )
+            if self.telemetry is not None:
+                self.telemetry.failed(endpoint, error)
+            raise error from err
+
+        if _json_result["status"] != "SUCCESS" and _json_result["error"] is not None:
+            api_error = _json_result["error"]
+            error_class = HyypAuthError if _is_token_error(api_error) else HyypApiError
+            error = error_class(f"{endpoint} failed: {api_error}")
+            if self.telemetry is not None:
+                self.telemetry.failed(endpoint, error)
+            raise error
+
+        return _json_result
+
+    async def _send(self, method: str, endpoint: str, query: dict[str, str]) -> str:
+        """Send a request once the rate limit allows and return the body."""
+        if self._gate is not None:
+            await self._gate.acquire()
+
+        started = time.monotonic()
+        try:
+            text = await self._transport(method, endpoint, query)
+        except (asyncio.TimeoutError, HyypApiError) as err:
+            if self.telemetry is not None:
+                self.telemetry.failed(endpoint, err)
+            if self.recorder is not None:
+                self.recorder.record(method, endpoint, query, started, error=err)
+            raise
+
+        if self.telemetry is not None:
+            self.telemetry.request_done(endpoint, time.monotonic() - started, len(text))
+        if self.recorder is not None:
+            self.recorder.record(method, endpoint, query, started, text=text)
+        return text
+
+    async def _transport(
+        self, method: str, endpoint: str, query: dict[str, str]
+    ) -> str:
+        """Send a request to the cloud and return the body."""
+        try:
+            async with self._session.request(
+                method,
+                self._base_url + endpoint,
+                params=query,
+                headers=REQUEST_HEADER,
+                allow_redirects=False,
+                timeout=self.timeout,
+            ) as req:
+                req.raise_for_status()
+                return await req.text()
+
+        except asyncio.TimeoutError:
+            # aiohttp aborts the request and releases the connection, let the
+            # caller see the timeout as such.
+            raise
+
+        except aiohttp.ClientResponseError as err:
+            if err.status == HTTPStatus.UNAUTHORIZED:
+                raise HyypAuthError(f"{err.status}: {err.message}") from err
+            raise HTTPError(f"{err.status}: {err.message}") from err
+
+        except aiohttp.ClientError as err:
+            raise InvalidURL("A Invalid URL or Proxy error occured") from err
+
+    async def login(self) -> dict[Any, Any]:
+        """Login to the api and keep the returned token."""
+        _json_result = await self._request(
+            "GET",
+            API_ENDPOINT_LOGIN,
+            {"email": self._email, "password": self._password},
+        )
+        self._params["token"] = _json_result["token"]
+
+        return _json_result
+
+    async def get_sync_info(self) -> dict[Any, Any]:
+        """Get user, site, partition and zone info."""
+        return await self._request("GET", API_ENDPOINT_SYNC_INFO)
+
+    async def get_state_info(self) -> dict[Any, Any]:
+        """Get armed partition, stay profile and bypassed zone ids."""
+        return await self._request("GET", API_ENDPOINT_STATE_INFO)
+
+    async def site_notifications(
+        self, site_id: int, timestamp: int | None = None
+    ) -> list[dict[Any, Any]]:
+        """Get site notifications, newest first."""
+        _json_result = await self._request(
+            "GET",
+            API_ENDPOINT_GET_SITE_NOTIFICATIONS,
+            {"siteId": site_id, "timestamp": timestamp},
+        )
+
+        return _json_result["listSiteNotifications"][str(site_id)] or []
+
+    async def arm_site(
+        self,
+        site_id: int,
+        arm: bool = True,
+        pin: str | None = None,
+        partition_id: int | None = None,
+        stay_profile_id: int | None = None,
+    ) -> dict[Any, Any]:
+        """Arm, disarm or stay arm a partition."""
+        return await self._request(
+            "GET",
+            API_ENDPOINT_ARM_SITE,
+            {
+                "arm": arm,
+                "pin": pin,
+                "partitionId": partition_id,
+                "siteId": site_id,
+                "stayProfileId": stay_profile_id,
+                "imei": None,
+                "clientImei": self._params["imei"],
+            },
+        )
+
+    async def trigger_alarm(
+        self,
+        site_id: int,
+        pin: str | None = None,
+        partition_id: int | None = None,
+        trigger_id: int | None = None,
+    ) -> dict[Any, Any]:
+        """Trigger a partition alarm."""
+        return await self._request(
+            "POST",
+            API_ENDPOINT_TRIGGER_ALARM,
+            {
+                "pin": pin,
+                "partitionId": partition_id,
+                "siteId": site_id,
+                "triggerId": trigger_id,
+                "imei": None,
+                "clientImei": self._params["imei"],
+            },
+        )
+
+    async def set_zone_bypass(
+        self,
+        zones: int | str,
+        partition_id: int | None = None,
+        stay_profile_id: int = 0,
+        pin: str | None = None,
+    ) -> dict[Any, Any]:
+        """Toggle zone bypass."""
+        return await self._request(
+            "GET",
+            API_ENDPOINT_SET_ZONE_BYPASS,
+            {
+                "partitionId": partition_id,
+                "zones": zones,
+                "stayProfileId": stay_profile_id,
+                "pin": pin,
+                "imei": None,
+                "clientImei": self._params["imei"],
+            },
+        )
+
+    async def last_notice(self, site_id: int) -> dict[str, Any]:
+        """Get the most recent notice of a site."""
+        return format_last_notice(await self.site_notifications(site_id))
+
+    async def load_site_infos(self) -> dict[Any, Any]:
+        """Get alarm infos formatted for hass, without site notices.
+
+        Sync and state info are fetched concurrently.
+        """
+        sync_info, state_info = await asyncio.gather(
+            self.get_sync_info(), self.get_state_info()
+        )
+
+        return format_alarm_infos(sync_info, state_info)
+
+    async def load_alarm_infos(self) -> dict[Any, Any]:
+        """Get alarm infos formatted for hass.
+
+        Site infos are followed by one concurrent notice request per site.
+        """
+        sites = await self.load_site_infos()
+        notices = await asyncio.gather(*(self.last_notice(site) for site in sites))
+
+        for site, notice in zip(sites.values(), notices):
+            site.update(notice)
+
+        return sites
+
+
+def format_last_notice(notifications: list[dict[Any, Any]]) -> dict[str, Any]:
+    """Return the last notice keys of a site from its notifications."""
+    if not notifications:
+        return {"lastNoticeTime": None, "lastNoticeName": None}
+
+    _last_notification = notifications[0]
+
+    return {
+        "lastNoticeTime": str(
+            datetime.fromtimestamp(_last_notification["timestamp"] / 1000)
+        ),  # Epoch in ms
+        "lastNoticeName": EventNumber.get(
+            str(_last_notification["eventNumber"]),
+            str(_last_notification["eventNumber"]),
+        ),
+    }
+
+
+def format_alarm_infos(
+    sync_info: dict[Any, Any], state_info: dict[Any, Any]
+) -> dict[Any, Any]:
+    """Nest partition, zone and stay profile info under their sites.
+
+    Produces the layout of ``pyhyypapi.HyypClient.load_alarm_infos``, without
+    the site notice keys.
+    """
+    sites = {site["id"]: site for site in sync_info["sites"]}
+    zone_ids = {zone["id"]: zone for zone in sync_info["zones"]}
+    stay_ids = {
+        stay_profile["id"]: stay_profile for stay_profile in sync_info["stayProfiles"]
+    }
+    partition_ids = {
+        partition["id"]: partition for partition in sync_info["partitions"]
+    }
+    bypassed_zone_ids = set(state_info["bypassedZoneIds"])
+    armed_partition_ids = set(state_info["armedPartitionIds"])
+    armed_stay_profile_ids = set(state_info["armedStayProfileIds"])
+
+    for site in sites.values():
+        site["partitions"] = {
+            partition_id: partition_ids[partition_id]
+            for partition_id in site["partitionIds"]
+            if partition_id in partition_ids
+        }
+
+        for partition_id, partition in site["partitions"].items():
+            partition["zones"] = {
+                zone_id: zone_ids[zone_id]
+                for zone_id in partition["zoneIds"]
+                if zone_id in zone_ids
+            }
+
+            for zone_id, zone in partition["zones"].items():
+                zone["bypassed"] = zone_id in bypassed_zone_ids
+
+            partition["stayProfiles"] = {
+                stay_id: stay_ids[stay_id]
+                for stay_id in partition["stayProfileIds"]
+                if stay_id in stay_ids
+            }
+
+            partition["armed"] = partition_id in armed_partition_ids
+            partition["stayArmed"] = False
+            partition["stayArmedProfileName"] = None
+
+            for stay_id, stay_profile in partition["stayProfiles"].items():
+                if stay_id in armed_stay_profile_ids:
+                    partition["stayArmed"] = True
+                    partition["stayArmedProfileName"] = stay_profile["name"]
+
+    return sites
@@ -1,12 +1,15 @@
 """Support for Hyyp binary sensors."""
 from __future__ import annotations
 
+from collections.abc import Iterable
+from typing import Any
+
 from homeassistant.components.binary_sensor import (
     BinarySensorEntity,
     BinarySensorEntityDescription,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
 from .const import DATA_COORDINATOR, DOMAIN
@@ -30,15 +33,20 @@ async def async_setup_entry(
         DATA_COORDINATOR
     ]
 
-    async_add_entities(
-        [
-            HyypSensor(coordinator, site_id, sensor)
-            for site_id in coordinator.data
-            for sensor, value in coordinator.data[site_id].items()
-            if sensor in BINARY_SENSOR_TYPES
-            if value is not None
-        ]
-    )
+    @callback
+    def _async_add_sites(site_ids: Iterable[Any]) -> None:
+        """Add sensors for sites."""
+        async_add_entities(
+            [
+                HyypSensor(coordinator, site_id, sensor)
+                for site_id in site_ids
+                for sensor in BINARY_SENSOR_TYPES
+                if coordinator.data.sites[site_id].value(sensor) is not None
+            ]
+        )
+
+    _async_add_sites(coordinator.data.sites)
+    entry.async_on_unload(coordinator.async_add_key_listener("sites", _async_add_sites))
 
 
 class HyypSensor(HyypSiteEntity, BinarySensorEntity):
@@ -53,13 +61,13 @@ class HyypSensor(HyypSiteEntity, BinarySensorEntity):
         binary_sensor: str,
     ) -> None:
         """Initialize the sensor."""
-        super().__init__(coordinator, site_id)
+        super().__init__(coordinator, site_id, (site_id, binary_sensor))
         self._sensor_name = binary_sensor
-        self._attr_name = f"{self.data['name']} {binary_sensor.title()}"
+        self._attr_name = f"{self.data.name} {binary_sensor.title()}"
         self._attr_unique_id = f"{self._site_id}_{binary_sensor}"
         self.entity_description = BINARY_SENSOR_TYPES[binary_sensor]
 
     @property
     def is_on(self) -> bool:
         """Return the state of the binary sensor."""
-        return bool(self.data[self._sensor_name])
+        return bool(self.data.value(self._sensor_name))
@@ -0,0 +1,192 @@
+"""Record and replay of IDS Hyyp api traffic.
+
+A cassette is a gzipped file of json lines: a header followed by one line per
+api request with its method, endpoint, query, start offset, round trip time
+and response body or error. Credentials and personal details are redacted
+before anything is kept.
+"""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Iterator
+from datetime import datetime
+import gzip
+from itertools import cycle
+import json
+import time
+from typing import Any
+
+from pyhyypapi.exceptions import HTTPError, HyypApiError, InvalidURL
+
+from homeassistant.components.diagnostics import async_redact_data
+
+from .api import HyypAsyncClient
+from .telemetry import error_type
+
+CASSETTE_VERSION = 1
+
+# Query parameters and response keys that never go into a cassette.
+TO_REDACT = {
+    "address",
+    "cellNumber",
+    "clientImei",
+    "email",
+    "firstName",
+    "imei",
+    "lastName",
+    "latitude",
+    "longitude",
+    "password",
+    "phoneNumber",
+    "pin",
+    "serialNumber",
+    "token",
+}
+
+ERRORS: dict[str, type[Exception]] = {
+    "HTTPError": HTTPError,
+    "HyypApiError": HyypApiError,
+    "InvalidURL": InvalidURL,
+    "TimeoutError": asyncio.TimeoutError,
+}
+
+
+def _request_key(
+    method: str, endpoint: str, query: dict[str, Any]
+) -> tuple[str, str, tuple[tuple[str, Any], ...]]:
+    """Return the key matching a request to its recordings."""
+    return method, endpoint, tuple(sorted(async_redact_data(query, TO_REDACT).items()))
+
+
+class HyypCassette:
+    """Recorded api interactions, in request order."""
+
+    def __init__(
+        self,
+        interactions: list[dict[str, Any]] | None = None,
+        header: dict[str, Any] | None = None,
+    ) -> None:
+        """Initialize the cassette."""
+        self.header = header or {
+            "version": CASSETTE_VERSION,
+            "recorded": datetime.now().isoformat(),
+        }
+        self.interactions = interactions or []
+
+    @classmethod
+    def load(cls, path: str) -> HyypCassette:
+        """Read a cassette file, does blocking I/O."""
+        with gzip.open(path, "rt", encoding="utf-8") as file:
+            header = json.loads(next(file))
+            return cls([json.loads(line) for line in file], header)
+
+    def save(self, path: str) -> None:
+        """Write the cassette file, does blocking I/O."""
+        with gzip.open(path, "wt", encoding="utf-8") as file:
+            for line in (self.header, *self.interactions):
+                file.write(json.dumps(line, separators=(",", ":")) + "\n")
+
+    def poll_starts(self) -> list[float]:
+        """Return the offsets of the recorded site info fetches."""
+        return [
+            interaction["t"]
+            for interaction in self.interactions
+            if interaction["endpoint"].endswith("/getSyncInfo")
+        ]
+
+
+class HyypCassetteRecorder:
+    """Collect the requests of a client into a cassette."""
+
+    def __init__(self) -> None:
+        """Start an empty recording."""
+        self.cassette = HyypCassette()
+        self._start = time.monotonic()
+
+    def record(
+        self,
+        method: str,
+        endpoint: str,
+        query: dict[str, Any],
+        started: float,
+        text: str | None = None,
+        error: Exception | None = None,
+    ) -> None:
+        """Record one request, started at the given monotonic time."""
+        interaction: dict[str, Any] = {
+            "t": round(started - self._start, 3),
+            "elapsed": round(time.monotonic() - started, 3),
+            "method": method,
+            "endpoint": endpoint,
+            "query": async_redact_data(query, TO_REDACT),
+        }
+
+        if error is not None:
+            interaction["error"] = error_type(error)
+            interaction["message"] = str(error)
+        else:
+            try:
+                body = json.loads(text or "")
+            except ValueError:
+                interaction["text"] = text
+            else:
+                interaction["body"] = async_redact_data(body, TO_REDACT)
+
+        self.cassette.interactions.append(interaction)
+
+
+class HyypReplayClient(HyypAsyncClient):
+    """Client answering requests from a cassette instead of the cloud.
+
+    Requests get the next recording with the same method, endpoint and query,
+    or failing that the next one of the same endpoint. Responses are delayed
+    by their recorded round trip divided by speed, a speed of 0 answers
+    immediately. With loop, recordings repeat once they run out.
+    """
+
+    def __init__(
+        self,
+        cassette: HyypCassette,
+        *,
+        pkg: str,
+        speed: float = 1.0,
+        loop: bool = True,
+    ) -> None:
+        """Index the cassette for replay."""
+        super().__init__(None, pkg=pkg, token="replay")  # type: ignore[arg-type]
+        self.speed = speed
+        self._replays: dict[Any, Iterator[dict[str, Any]]] = {}
+
+        grouped: dict[Any, list[dict[str, Any]]] = {}
+        for interaction in cassette.interactions:
+            method, endpoint = interaction["method"], interaction["endpoint"]
+            grouped.setdefault((method, endpoint), []).append(interaction)
+            grouped.setdefault(
+                _request_key(method, endpoint, interaction["query"]), []
+            ).append(interaction)
+
+        for key, interactions in grouped.items():
+            self._replays[key] = cycle(interactions) if loop else iter(interactions)
+
+    async def _transport(
+        self, method: str, endpoint: str, query: dict[str, str]
+    ) -> str:
+        """Return the recorded response of a request."""
+        for key in (_request_key(method, endpoint, query), (method, endpoint)):
+            if (replay := self._replays.get(key)) is not None and (
+                interaction := next(replay, None)
+            ) is not None:
+                break
+        else:
+            raise HyypApiError(f"No recorded response for {method} {endpoint}")
+
+        if self.speed:
+            await asyncio.sleep(interaction["elapsed"] / self.speed)
+
+        if error := interaction.get("error"):
+            raise ERRORS.get(error, HyypApiError)(interaction["message"])
+
+        if "body" in interaction:
+            return json.dumps(interaction["body"])
+
+        return str(interaction["text"])
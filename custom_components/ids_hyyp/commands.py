@@ -0,0 +1,127 @@
+"""Per-site command queue for IDS Hyyp."""
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from collections.abc import Awaitable, Callable, Hashable
+import logging
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN, STATUS_SUPERSEDED
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class HyypCommand:
+    """A queued api command and the future its caller waits on."""
+
+    __slots__ = ("call", "coalesce_key", "refresh", "future")
+
+    def __init__(
+        self,
+        call: Callable[[], Awaitable[dict[Any, Any]]],
+        coalesce_key: Hashable | None,
+        refresh: bool,
+        future: asyncio.Future[dict[Any, Any]],
+    ) -> None:
+        """Initialize the command."""
+        self.call = call
+        self.coalesce_key = coalesce_key
+        self.refresh = refresh
+        self.future = future
+
+
+class HyypCommandQueue:
+    """Run the commands of one site in order, one at a time.
+
+    A command that has not started yet is superseded by a later command with
+    the same coalesce key, e.g. an arm followed by a disarm of the same
+    partition only sends the disarm. When the queue drains, on_burst_done is
+    called once with whether any command of the burst asked for a refresh.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        site_id: Any,
+        on_burst_done: Callable[[bool], Awaitable[None]],
+    ) -> None:
+        """Initialize the queue."""
+        self._hass = hass
+        self._site_id = site_id
+        self._on_burst_done = on_burst_done
+        self._pending: deque[HyypCommand] = deque()
+        self._worker: asyncio.Task | None = None
+
+    async def async_submit(
+        self,
+        call: Callable[[], Awaitable[dict[Any, Any]]],
+        *,
+        coalesce_key: Hashable | None = None,
+        refresh: bool = False,
+    ) -> dict[Any, Any]:
+        """Queue a command and return its api response."""
+        if coalesce_key is not None:
+            for command in [
+                command
+                for command in self._pending
+                if command.coalesce_key == coalesce_key
+            ]:
+                _LOGGER.debug(
+                    "Command %s superseded on site %s", coalesce_key, self._site_id
+                )
+                self._pending.remove(command)
+                if not command.future.done():
+                    command.future.set_result({"status": STATUS_SUPERSEDED})
+
+        command = HyypCommand(
+            call, coalesce_key, refresh, self._hass.loop.create_future()
+        )
+        self._pending.append(command)
+
+        if self._worker is None or self._worker.done():
+            self._worker = self._hass.async_create_background_task(
+                self._async_run(), f"{DOMAIN} site {self._site_id} commands"
+            )
+
+        return await command.future
+
+    async def _async_run(self) -> None:
+        """Send queued commands until the queue is empty.
+
+        Commands queued while on_burst_done runs start the next burst, no
+        other worker is started for them while this one is running.
+        """
+        while self._pending:
+            refresh = False
+
+            while self._pending:
+                command = self._pending.popleft()
+                refresh |= command.refresh
+
+                try:
+                    result = await command.call()
+
+                except asyncio.CancelledError:
+                    command.future.cancel()
+                    raise
+
+                except Exception as err:  # pylint: disable=broad-except
+                    if not command.future.done():
+                        command.future.set_exception(err)
+
+                else:
+                    if not command.future.done():
+                        command.future.set_result(result)
+
+            await self._on_burst_done(refresh)
+
+    def cancel(self) -> None:
+        """Cancel the worker and all queued commands."""
+        if self._worker is not None:
+            self._worker.cancel()
+
+        while self._pending:
+            self._pending.popleft().future.cancel()
@@ -1,23 +1,42 @@
 """Config flow for ezviz."""
 from __future__ import annotations
 
+import asyncio
+from collections.abc import Mapping
 import logging
+import time
 from typing import Any
 
-from pyhyypapi.client import HyypClient
 from pyhyypapi.constants import DEFAULT_TIMEOUT
 from pyhyypapi.exceptions import HTTPError, HyypApiError, InvalidURL
 import voluptuous as vol
 
-from homeassistant.config_entries import ConfigEntry, ConfigFlow, OptionsFlow
+from homeassistant.config_entries import (
+    ConfigEntry,
+    ConfigEntryState,
+    ConfigFlow,
+    OptionsFlow,
+)
 from homeassistant.const import CONF_EMAIL, CONF_PASSWORD, CONF_TIMEOUT, CONF_TOKEN
-from homeassistant.core import callback
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.data_entry_flow import FlowResult
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
 
+from .api import HyypAsyncClient
 from .const import (
     ATTR_ARM_CODE,
     ATTR_BYPASS_CODE,
+    CONF_CONNECT_TIMEOUT,
+    CONF_PER_SITE_FETCH,
     CONF_PKG,
+    CONF_READ_TIMEOUT,
+    CONF_STALE_POLLS,
+    CONF_STALE_TIME,
+    DATA_FLOW_INVENTORY,
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_READ_TIMEOUT,
+    DEFAULT_STALE_POLLS,
+    DEFAULT_STALE_TIME,
     DOMAIN,
     PKG_ADT_SECURE_HOME,
     PKG_IDS_HYYP,
@@ -26,23 +45,61 @@ from .const import (
 _LOGGER = logging.getLogger(__name__)
 DEFAULT_OPTIONS = {
     CONF_TIMEOUT: DEFAULT_TIMEOUT,
+    CONF_CONNECT_TIMEOUT: DEFAULT_CONNECT_TIMEOUT,
+    CONF_READ_TIMEOUT: DEFAULT_READ_TIMEOUT,
 }
 
 
-def _validate_and_create_auth(data: dict) -> dict[str, Any]:
-    """Try to login to IDS Hyyp account and return token."""
+async def _validate_and_create_auth(
+    hass: HomeAssistant, data: dict, fetch_inventory: bool = True
+) -> dict[str, Any]:
+    """Try to login to IDS Hyyp account and return token and credentials."""
     # Verify cloud credentials by attempting a login request with username and password.
-    # Return login token.
+    # Keep the credentials, so the token can be renewed when it expires.
 
-    hyyp_client = HyypClient(
-        data[CONF_EMAIL],
-        data[CONF_PASSWORD],
-        data[CONF_PKG],
+    hyyp_client = HyypAsyncClient(
+        async_get_clientsession(hass),
+        email=data[CONF_EMAIL],
+        password=data[CONF_PASSWORD],
+        pkg=data[CONF_PKG],
     )
 
-    hyyp_token = hyyp_client.login()
+    hyyp_token = await hyyp_client.login()
+
+    if fetch_inventory:
+        await _async_fetch_inventory(hass, hyyp_client, data[CONF_EMAIL])
+
+    return {
+        CONF_TOKEN: hyyp_token[CONF_TOKEN],
+        CONF_PKG: data[CONF_PKG],
+        CONF_EMAIL: data[CONF_EMAIL],
+        CONF_PASSWORD: data[CONF_PASSWORD],
+    }
+
+
+async def _async_fetch_inventory(
+    hass: HomeAssistant, hyyp_client: HyypAsyncClient, account: str
+) -> None:
+    """Fetch the sites of a validated account for the entry setup to start with.
+
+    Setup then builds entities from this inventory instead of fetching it
+    again. It's only a head start, setup fetches as usual if this fails.
+    """
+    try:
+        sites = await hyyp_client.load_site_infos()
+        notifications = await asyncio.gather(
+            *(hyyp_client.site_notifications(site_id) for site_id in sites)
+        )
+
+    except (asyncio.TimeoutError, HyypApiError) as err:
+        _LOGGER.debug("Failed to fetch the inventory of %s: %s", account, err)
+        return
 
-    return {CONF_TOKEN: hyyp_token[CONF_TOKEN], CONF_PKG: data[CONF_PKG]}
+    hass.data.setdefault(DATA_FLOW_INVENTORY, {})[account] = (
+        time.monotonic(),
+        sites,
+        dict(zip(sites, notifications)),
+    )
 
 
 class HyypConfigFlow(ConfigFlow, domain=DOMAIN):
@@ -50,6 +107,8 @@ class HyypConfigFlow(ConfigFlow, domain=DOMAIN):
 
     VERSION = 1
 
+    _reauth_entry: ConfigEntry | None = None
+
     @staticmethod
     @callback
     def async_get_options_flow(config_entry: ConfigEntry) -> HyypOptionsFlowHandler:
@@ -65,14 +124,11 @@ class HyypConfigFlow(ConfigFlow, domain=DOMAIN):
         token_data = {}
 
         if user_input is not None:
-
             await self.async_set_unique_id(user_input[CONF_EMAIL])
             self._abort_if_unique_id_configured()
 
             try:
-                token_data = await self.hass.async_add_executor_job(
-                    _validate_and_create_auth, user_input
-                )
+                token_data = await _validate_and_create_auth(self.hass, user_input)
 
             except InvalidURL:
                 errors["base"] = "invalid_host"
@@ -108,6 +164,70 @@ class HyypConfigFlow(ConfigFlow, domain=DOMAIN):
             step_id="user", data_schema=data_schema, errors=errors
         )
 
+    async def async_step_reauth(self, entry_data: Mapping[str, Any]) -> FlowResult:
+        """Handle refused credentials."""
+        self._reauth_entry = self.hass.config_entries.async_get_entry(
+            self.context["entry_id"]
+        )
+        return await self.async_step_reauth_confirm()
+
+    async def async_step_reauth_confirm(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Ask for the password and hand new credentials to the running entry.
+
+        A loaded entry isn't reloaded, its update listener passes the
+        credentials to the live client. An entry that failed to set up is
+        reloaded with them.
+        """
+        assert self._reauth_entry
+        errors = {}
+        email = self._reauth_entry.unique_id
+
+        if user_input is not None:
+            try:
+                token_data = await _validate_and_create_auth(
+                    self.hass,
+                    {
+                        CONF_EMAIL: email,
+                        CONF_PASSWORD: user_input[CONF_PASSWORD],
+                        CONF_PKG: self._reauth_entry.data[CONF_PKG],
+                    },
+                    fetch_inventory=False,
+                )
+
+            except InvalidURL:
+                errors["base"] = "invalid_host"
+
+            except HTTPError:
+                errors["base"] = "cannot_connect"
+
+            except HyypApiError:
+                errors["base"] = "invalid_auth"
+
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception("Unexpected exception")
+                return self.async_abort(reason="unknown")
+
+            else:
+                self.hass.config_entries.async_update_entry(
+                    self._reauth_entry, data={**self._reauth_entry.data, **token_data}
+                )
+                if self._reauth_entry.state is not ConfigEntryState.LOADED:
+                    self.hass.async_create_task(
+                        self.hass.config_entries.async_reload(
+                            self._reauth_entry.entry_id
+                        )
+                    )
+                return self.async_abort(reason="reauth_successful")
+
+        return self.async_show_form(
+            step_id="reauth_confirm",
+            data_schema=vol.Schema({vol.Required(CONF_PASSWORD): str}),
+            description_placeholders={CONF_EMAIL: email or ""},
+            errors=errors,
+        )
+
 
 class HyypOptionsFlowHandler(OptionsFlow):
     """Handle Hyyp client options."""
@@ -131,6 +251,34 @@ class HyypOptionsFlowHandler(OptionsFlow):
                         CONF_TIMEOUT, DEFAULT_TIMEOUT
                     ),
                 ): int,
+                vol.Optional(
+                    CONF_CONNECT_TIMEOUT,
+                    default=self.config_entry.options.get(
+                        CONF_CONNECT_TIMEOUT, DEFAULT_CONNECT_TIMEOUT
+                    ),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1)),
+                vol.Optional(
+                    CONF_READ_TIMEOUT,
+                    default=self.config_entry.options.get(
+                        CONF_READ_TIMEOUT, DEFAULT_READ_TIMEOUT
+                    ),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1)),
+                vol.Optional(
+                    CONF_PER_SITE_FETCH,
+                    default=self.config_entry.options.get(CONF_PER_SITE_FETCH, False),
+                ): bool,
+                vol.Optional(
+                    CONF_STALE_POLLS,
+                    default=self.config_entry.options.get(
+                        CONF_STALE_POLLS, DEFAULT_STALE_POLLS
+                    ),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0)),
+                vol.Optional(
+                    CONF_STALE_TIME,
+                    default=self.config_entry.options.get(
+                        CONF_STALE_TIME, DEFAULT_STALE_TIME
+                    ),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0)),
                 vol.Optional(ATTR_ARM_CODE): str,
                 vol.Optional(ATTR_BYPASS_CODE): str,
             }
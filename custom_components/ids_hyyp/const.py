@@ -6,6 +6,11 @@ MODEL = "Hyyp"
 
 # Configuration
 CONF_PKG = "pkg"
+CONF_CONNECT_TIMEOUT = "connect_timeout"
+CONF_READ_TIMEOUT = "read_timeout"
+CONF_PER_SITE_FETCH = "per_site_fetch"
+CONF_STALE_POLLS = "stale_polls"
+CONF_STALE_TIME = "stale_time"
 
 # Package types
 PKG_ADT_SECURE_HOME = "za.co.adt.securehome.android"
@@ -13,13 +18,99 @@ PKG_IDS_HYYP = "com.hyyp247.home"
 
 # Defaults
 DEFAULT_TIMEOUT = 25
+DEFAULT_CONNECT_TIMEOUT = 10
+DEFAULT_READ_TIMEOUT = 20
+DEFAULT_STALE_POLLS = 3
+DEFAULT_STALE_TIME = 300
+
+# Polling intervals (seconds)
+FAST_POLL_INTERVAL = 5
+FAST_POLL_WINDOW = 30
+DEFAULT_POLL_INTERVAL = 60
+IDLE_POLL_INTERVAL = 300
+
+# Failure handling
+BREAKER_THRESHOLD = 3
+
+# Request rate limit per package
+REQUEST_RATE = 1.0
+REQUEST_BURST = 60
+
+# Worker threads for blocking jobs
+WORKERS = 2
+WORKER_QUEUE_DEPTH = 8
+
+# Command confirmation (seconds)
+CONFIRM_INTERVAL = 2
+CONFIRM_TIMEOUT = 30
 
 # Data
 DATA_COORDINATOR = "coordinator"
+DATA_WORKERS = "workers"
+DATA_FLOW_INVENTORY = f"{DOMAIN}_flow_inventory"
+
+# Seconds the inventory fetched by the config flow may serve as first data
+FLOW_INVENTORY_MAX_AGE = 60
+DATA_REQUEST_GATES = f"{DOMAIN}_request_gates"
+DATA_STORES = f"{DOMAIN}_stores"
+
+# Notice history
+NOTICE_HISTORY_SIZE = 100
+NOTICE_MAX_PAGES = 3
+
+# Events
+EVENT_NOTICE = f"{DOMAIN}_notice"
+
+# Storage
+STORAGE_VERSION = 1
+STORAGE_SAVE_DELAY = 10
+
+# Command status of a queued command replaced by a later one
+STATUS_SUPERSEDED = "SUPERSEDED"
+# Command status of a command skipped because the state was already requested
+STATUS_UNCHANGED = "UNCHANGED"
 
 # Service names
 SERVICE_BYPASS_ZONE = "zone_bypass_code"
+SERVICE_BYPASS_ZONES = "bypass_zones"
+SERVICE_GET_NOTICES = "get_notices"
+SERVICE_RECORD_CASSETTE = "record_cassette"
+SERVICE_PROFILE = "profile"
+SERVICE_ARM_PARTITIONS = "arm_partitions"
+
+# Cassette recording (seconds)
+DEFAULT_CASSETTE_DURATION = 600
+MAX_CASSETTE_DURATION = 3600
+
+# Profiling
+DEFAULT_PROFILE_CYCLES = 5
+MAX_PROFILE_CYCLES = 100
+PROFILE_TOP_ALLOCATIONS = 30
+
+# Service concurrency
+DEFAULT_MAX_CONCURRENCY = 4
+MAX_CONCURRENCY = 20
+
+# Modes of the arm partitions service
+ARM_MODE_AWAY = "away"
+ARM_MODE_HOME = "home"
+ARM_MODE_DISARM = "disarm"
+ARM_MODES = [ARM_MODE_AWAY, ARM_MODE_HOME, ARM_MODE_DISARM]
 
 # Attributes
+ATTR_BYPASS = "bypass"
 ATTR_BYPASS_CODE = "bypass_code"
+ATTR_MAX_CONCURRENCY = "max_concurrency"
 ATTR_ARM_CODE = "arm_code"
+ATTR_STALE = "stale"
+ATTR_LAST_SUCCESSFUL_UPDATE = "last_successful_update"
+ATTR_SITE_ID = "site_id"
+ATTR_SITE_NAME = "site_name"
+ATTR_NOTICE_TIME = "notice_time"
+ATTR_NOTICE_NAME = "notice_name"
+ATTR_TIMESTAMP = "timestamp"
+ATTR_EVENT_NUMBER = "event_number"
+ATTR_LIMIT = "limit"
+ATTR_DURATION = "duration"
+ATTR_CYCLES = "cycles"
+ATTR_MODE = "mode"
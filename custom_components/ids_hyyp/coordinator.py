@@ -1,40 +1,903 @@
 """Provides the ezviz DataUpdateCoordinator."""
-from datetime import timedelta
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable, Mapping
+from copy import copy
+from datetime import datetime, timedelta
+from functools import partial
 import logging
+import time
 from typing import Any
 
 from async_timeout import timeout
-from pyhyypapi.client import HyypClient
-from pyhyypapi.exceptions import HTTPError, HyypApiError, InvalidURL
+from pyhyypapi.exceptions import HyypApiError
 
-from homeassistant.core import HomeAssistant
+from homeassistant.const import (
+    CONF_EMAIL,
+    CONF_PASSWORD,
+    CONF_TIMEOUT,
+    CONF_TOKEN,
+    Platform,
+)
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.exceptions import ConfigEntryAuthFailed, HomeAssistantError
+from homeassistant.helpers import device_registry as dr, entity_registry as er
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.util import dt as dt_util
 
-from .const import DOMAIN
+from .api import (
+    HyypAsyncClient,
+    HyypAuthError,
+    build_client_timeout,
+    format_last_notice,
+)
+from .commands import HyypCommandQueue
+from .const import (
+    ATTR_ARM_CODE,
+    ATTR_BYPASS_CODE,
+    ATTR_SITE_ID,
+    ATTR_SITE_NAME,
+    CONF_CONNECT_TIMEOUT,
+    CONF_PER_SITE_FETCH,
+    CONF_READ_TIMEOUT,
+    CONF_STALE_POLLS,
+    CONF_STALE_TIME,
+    CONFIRM_INTERVAL,
+    CONFIRM_TIMEOUT,
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_POLL_INTERVAL,
+    DEFAULT_READ_TIMEOUT,
+    DEFAULT_STALE_POLLS,
+    DEFAULT_STALE_TIME,
+    DEFAULT_TIMEOUT,
+    DOMAIN,
+    EVENT_NOTICE,
+    FAST_POLL_INTERVAL,
+    FAST_POLL_WINDOW,
+    IDLE_POLL_INTERVAL,
+    STATUS_UNCHANGED,
+    STORAGE_SAVE_DELAY,
+)
+from .history import HyypNoticeHistory
+from .models import HyypPartition, HyypSnapshot, HyypZone
+from .profiling import HyypCycleProfiler
+from .resilience import HyypCircuitBreaker, HyypCircuitOpenError, backoff_delay
+from .storage import async_get_store, snapshot_store_key
+from .telemetry import OPERATION_REFRESH, HyypTelemetry
+from .workers import HyypWorkerPool
 
 _LOGGER = logging.getLogger(__name__)
 
+# Snapshot lookups whose keys entities are discovered by.
+KEY_KINDS = ("sites", "partitions", "zones")
 
-class HyypDataUpdateCoordinator(DataUpdateCoordinator):
+
+class HyypDataUpdateCoordinator(DataUpdateCoordinator[HyypSnapshot]):
     """Class to manage fetching IDSHyyp data."""
 
     def __init__(
-        self, hass: HomeAssistant, *, api: HyypClient, api_timeout: int
+        self,
+        hass: HomeAssistant,
+        *,
+        api: HyypAsyncClient,
+        entry_id: str,
+        options: Mapping[str, Any],
+        workers: HyypWorkerPool,
     ) -> None:
         """Initialize global IDS Hyyp data updater."""
         self.hyyp_client = api
-        self._api_timeout = api_timeout
-        update_interval = timedelta(seconds=60)
+        self.workers = workers
+        self.telemetry = api.telemetry = HyypTelemetry()
+        self.profiler: HyypCycleProfiler | None = None
+        self._api_timeout = DEFAULT_TIMEOUT
+        self.per_site_fetch = False
+        self.stale_polls = DEFAULT_STALE_POLLS
+        self.stale_time = DEFAULT_STALE_TIME
+        self.arm_code: str | None = None
+        self.bypass_code: str | None = None
+        self._shards: dict[Any, HyypSiteShard] = {}
+        self._store = async_get_store(hass, snapshot_store_key(entry_id))
+        self.history = HyypNoticeHistory(hass, entry_id)
+        self.stale = False
+        self.last_successful_update: datetime | None = None
+        self._last_success = 0.0
+        self._failed_polls = 0
+        self.breaker = HyypCircuitBreaker()
+        self._fast_poll_until = 0.0
+        self._idle_polls = 0
+        self._changed_contexts: set[tuple[Any, ...]] | None = None
+        self._expectations: dict[tuple[Any, ...], Callable[[dict[str, Any]], bool]] = {}
+        # Last confirmed records of the contexts in _expectations
+        self._confirmed: dict[tuple[Any, ...], HyypPartition | HyypZone] = {}
+        self._confirm_deadline = 0.0
+        self._confirm_task: asyncio.Task | None = None
+        self._notice_task: asyncio.Task | None = None
+        self._command_queues: dict[Any, HyypCommandQueue] = {}
+        self._key_listeners: dict[str, list[Callable[[set[Any]], None]]] = {
+            kind: [] for kind in KEY_KINDS
+        }
+        self._added_keys: dict[str, set[Any]] = {}
+        self._removed_keys: dict[str, set[Any]] = {}
+        update_interval = timedelta(seconds=DEFAULT_POLL_INTERVAL)
 
         super().__init__(hass, _LOGGER, name=DOMAIN, update_interval=update_interval)
 
-    async def _async_update_data(self) -> dict[Any, Any]:
-        """Fetch data from IDS Hyyp."""
+        self.async_apply_options(options)
+
+    @callback
+    def async_apply_options(self, options: Mapping[str, Any]) -> None:
+        """Apply config entry options to the running coordinator.
+
+        Takes effect from the next request, without a reload or refresh.
+        """
+        self._api_timeout = options.get(CONF_TIMEOUT, DEFAULT_TIMEOUT)
+        self.hyyp_client.timeout = build_client_timeout(
+            self._api_timeout,
+            options.get(CONF_CONNECT_TIMEOUT, DEFAULT_CONNECT_TIMEOUT),
+            options.get(CONF_READ_TIMEOUT, DEFAULT_READ_TIMEOUT),
+        )
+        self.per_site_fetch = options.get(CONF_PER_SITE_FETCH, False)
+        self.stale_polls = options.get(CONF_STALE_POLLS, DEFAULT_STALE_POLLS)
+        self.stale_time = options.get(CONF_STALE_TIME, DEFAULT_STALE_TIME)
+        self.bypass_code = options.get(ATTR_BYPASS_CODE)
+
+        if (arm_code := options.get(ATTR_ARM_CODE)) != self.arm_code:
+            self.arm_code = arm_code
+
+            # Alarm panels show whether a code is required.
+            if self.data is not None:
+                self._async_update_contexts(
+                    {(*key, None) for key in self.data.partitions}
+                )
+
+    @callback
+    def async_apply_credentials(self, data: Mapping[str, Any]) -> None:
+        """Use the credentials of the config entry, e.g. after reauth.
+
+        The client keeps running, and polling resumes if it stopped for
+        refused credentials.
+        """
+        if not self.hyyp_client.set_credentials(
+            data.get(CONF_EMAIL), data.get(CONF_PASSWORD), data[CONF_TOKEN]
+        ):
+            return
+
+        if not self.last_update_success:
+            self.hass.async_create_task(self.async_request_refresh())
+
+    @callback
+    def _async_save_token(self) -> None:
+        """Store the token in the config entry after the client renewed it."""
+        if (
+            self.config_entry is not None
+            and self.config_entry.data.get(CONF_TOKEN) != self.hyyp_client.token
+        ):
+            self.hass.config_entries.async_update_entry(
+                self.config_entry,
+                data={**self.config_entry.data, CONF_TOKEN: self.hyyp_client.token},
+            )
+
+    @callback
+    def async_add_key_listener(
+        self, kind: str, add_entities: Callable[[set[Any]], None]
+    ) -> CALLBACK_TYPE:
+        """Call add_entities with the keys of kind that appear in a refresh."""
+        self._key_listeners[kind].append(add_entities)
+
+        @callback
+        def remove_listener() -> None:
+            self._key_listeners[kind].remove(add_entities)
+
+        return remove_listener
+
+    @callback
+    def _async_track_keys(self, data: HyypSnapshot) -> None:
+        """Record the keys added and removed since the previous snapshot."""
+        if self.data is None:
+            return
+
+        for kind in KEY_KINDS:
+            keys = getattr(data, kind).keys()
+            old_keys = getattr(self.data, kind).keys()
+
+            if added := keys - old_keys:
+                self._added_keys[kind] = added
+            if removed := old_keys - keys:
+                self._removed_keys[kind] = removed
+
+    @callback
+    def _async_update_entities(self) -> None:
+        """Add entities for new keys and remove those of removed keys."""
+        added, self._added_keys = self._added_keys, {}
+        removed, self._removed_keys = self._removed_keys, {}
+
+        for kind, keys in added.items():
+            _LOGGER.debug("Discovered %s %s", kind, keys)
+            for add_entities in self._key_listeners[kind]:
+                add_entities(keys)
+
+        if not removed:
+            return
+
+        _LOGGER.debug("Removing %s", removed)
+        entity_registry = er.async_get(self.hass)
+        device_registry = dr.async_get(self.hass)
+
+        for platform, kind in (
+            (Platform.ALARM_CONTROL_PANEL, "partitions"),
+            (Platform.SWITCH, "zones"),
+        ):
+            for key in removed.get(kind, ()):
+                if entity_id := entity_registry.async_get_entity_id(
+                    platform, DOMAIN, "_".join(map(str, key))
+                ):
+                    entity_registry.async_remove(entity_id)
+
+        # Detaching a site's device removes its remaining entities.
+        for site_id in removed.get("sites", ()):
+            if device := device_registry.async_get_device(
+                identifiers={(DOMAIN, str(site_id))}
+            ):
+                device_registry.async_update_device(
+                    device.id, remove_config_entry_id=self.config_entry.entry_id
+                )
+
+    @callback
+    def async_set_inventory(
+        self, sites: dict[Any, Any], notifications: dict[Any, list[Any]]
+    ) -> None:
+        """Start from site infos and notifications fetched by the config flow."""
+        for site_id, site_notifications in notifications.items():
+            self.history.async_add(site_id, site_notifications)
+
+        self._last_success = time.monotonic()
+        self.last_successful_update = dt_util.utcnow()
+        self.async_set_updated_data(_build_snapshot(sites, notifications))
+        self._store.async_delay_save(self._data_to_store, STORAGE_SAVE_DELAY)
+
+    async def async_load_cache(self) -> bool:
+        """Load the last good snapshot, return True if one was found.
+
+        Cached data is flagged stale until the first live refresh completes,
+        its last successful update tells how old it is.
+        """
+        if not (cached := await self._store.async_load()):
+            return False
+
+        self.data = HyypSnapshot.from_api(cached["sites"])
+        self.stale = True
+        self._last_success = time.monotonic()
+
+        # The stale_time budget runs from the cached refresh, not from startup.
+        if last_update := cached.get("last_successful_update"):
+            self.last_successful_update = dt_util.parse_datetime(last_update)
+        if self.last_successful_update is not None:
+            age = (dt_util.utcnow() - self.last_successful_update).total_seconds()
+            self._last_success -= max(age, 0)
+
+        return True
+
+    @callback
+    def _data_to_store(self) -> dict[str, Any]:
+        """Return the snapshot and when it was last refreshed to store.
+
+        States awaiting confirmation are stored as last confirmed.
+        """
+        data = self.data
+        if self._confirmed:
+            data = data.with_records(self._confirmed)
+
+        return {
+            "sites": data.as_dict(),
+            "last_successful_update": (
+                self.last_successful_update.isoformat()
+                if self.last_successful_update
+                else None
+            ),
+        }
+
+    @callback
+    def async_poll_fast(self) -> None:
+        """Poll fast for a short window, e.g. after a command was sent."""
+        self._fast_poll_until = time.monotonic() + FAST_POLL_WINDOW
+        self.update_interval = timedelta(seconds=FAST_POLL_INTERVAL)
+
+    async def async_send_command(
+        self,
+        site_id: Any,
+        call: Callable[[], Awaitable[dict[Any, Any]]],
+        *,
+        coalesce_key: Hashable | None = None,
+        refresh: bool = False,
+    ) -> dict[Any, Any]:
+        """Send a command through the command queue of its site.
+
+        Set refresh for commands whose result only shows up in a full refresh.
+        One refresh is requested per burst of queued commands. Raises
+        HyypCircuitOpenError right away while the api is known to be down.
+        """
+        self.breaker.check()
+
+        if (queue := self._command_queues.get(site_id)) is None:
+            queue = self._command_queues[site_id] = HyypCommandQueue(
+                self.hass, site_id, self._async_command_burst_done
+            )
+
+        return await queue.async_submit(
+            call, coalesce_key=coalesce_key, refresh=refresh
+        )
+
+    async def async_arm_partition(
+        self,
+        site_id: Any,
+        partition_id: Any,
+        *,
+        arm: bool,
+        code: str | None,
+        stay_profile_id: int | None = None,
+        skip_unchanged: bool = False,
+    ) -> dict[Any, Any]:
+        """Arm, stay arm with a profile or disarm a partition.
+
+        Once the api accepted the command, the requested state shows until
+        it is confirmed. Commands of several partitions are confirmed by the
+        same state polls. With skip_unchanged, a partition already in the
+        requested state when its turn in the queue comes is left alone.
+        """
+        stay_armed = arm and stay_profile_id is not None
+
+        async def async_arm() -> dict[Any, Any]:
+            partition = self.data.partitions[(site_id, partition_id)]
+            if skip_unchanged and (
+                # Disarming also silences a triggered alarm.
+                partition.armed and partition.stay_armed == stay_armed
+                if arm
+                else not partition.armed and not partition.alarm
+            ):
+                return {"status": STATUS_UNCHANGED}
+
+            update_ok = await self.hyyp_client.arm_site(
+                site_id, arm, code, partition_id, stay_profile_id
+            )
+            # Expect the state before the next queued command checks it.
+            if update_ok["status"] == "SUCCESS":
+                self.async_expect_partition(
+                    site_id, partition_id, armed=arm, stay_armed=stay_armed
+                )
+
+            return update_ok
+
+        return await self.async_send_command(
+            site_id, async_arm, coalesce_key=("arm", partition_id)
+        )
+
+    async def async_bypass_zone(
+        self,
+        site_id: Any,
+        partition_id: Any,
+        zone_id: Any,
+        *,
+        bypass: bool,
+        code: str | None,
+    ) -> dict[Any, Any]:
+        """Bypass or unbypass a zone unless it already is.
+
+        The api toggles bypass, so the current state is checked when the
+        command's turn in the queue comes, after earlier commands changed it.
+        """
+
+        async def async_bypass() -> dict[Any, Any]:
+            if self.data.zones[(site_id, partition_id, zone_id)].bypassed == bypass:
+                return {"status": STATUS_UNCHANGED}
+
+            update_ok = await self.hyyp_client.set_zone_bypass(
+                zone_id, partition_id, 0, code
+            )
+            if update_ok["status"] == "SUCCESS":
+                self.async_expect_zone(site_id, partition_id, zone_id, bypassed=bypass)
+
+            return update_ok
+
+        return await self.async_send_command(site_id, async_bypass)
+
+    async def _async_command_burst_done(self, refresh: bool) -> None:
+        """Refresh once after a burst of commands that asked for it."""
+        if refresh:
+            self.async_poll_fast()
+            await self.async_request_refresh()
+
+    async def async_save_storage(self) -> None:
+        """Write the snapshot and notice history now.
+
+        Pending delayed writes are replaced, so nothing from this coordinator
+        is written after its entry unloaded.
+        """
+        if self.data is not None:
+            await self._store.async_save(self._data_to_store())
+        await self.history.async_save()
+
+    async def async_shutdown(self) -> None:
+        """Cancel queued commands, confirmation polling and profiling."""
+        await super().async_shutdown()
+
+        if self.profiler is not None:
+            self.profiler.close()
+            self.profiler = None
+
+        for queue in self._command_queues.values():
+            queue.cancel()
+
+        for task in (self._confirm_task, self._notice_task):
+            if task is not None:
+                task.cancel()
+
+    @callback
+    def async_expect_partition(
+        self, site_id: int, partition_id: int, *, armed: bool, stay_armed: bool
+    ) -> None:
+        """Show a partition arm state until the api confirms or times out."""
+        context = (site_id, partition_id, None)
+        partition = self._async_expected_record(context)
+        stay_profile_ids = partition.stay_profile_ids
+        partition.alarm = False
+        partition.armed = armed
+        partition.stay_armed = stay_armed
+
+        self._async_expect(
+            context,
+            lambda state: (
+                (partition_id in state["armedPartitionIds"]) == armed
+                and any(
+                    stay_profile_id in state["armedStayProfileIds"]
+                    for stay_profile_id in stay_profile_ids
+                )
+                == stay_armed
+            ),
+        )
+
+    @callback
+    def async_expect_zone(
+        self, site_id: int, partition_id: int, zone_id: Any, *, bypassed: bool
+    ) -> None:
+        """Show a zone bypass state until the api confirms or times out."""
+        context = (site_id, partition_id, zone_id)
+        self._async_expected_record(context).bypassed = bypassed
+
+        self._async_expect(
+            context,
+            lambda state: (zone_id in state["bypassedZoneIds"]) == bypassed,
+        )
+
+    @callback
+    def _async_expected_record(self, context: tuple[Any, ...]) -> Any:
+        """Return a copy of a record to show an optimistic state in.
+
+        The confirmed record is kept aside, so unconfirmed state is never
+        stored. The copy replaces it in the live snapshot.
+        """
+        records, key = self.data.records_of(context)
+        self._confirmed.setdefault(context, records[key])
+        record = records[key] = copy(records[key])
+
+        return record
+
+    @callback
+    def _async_expect(
+        self,
+        context: tuple[Any, ...],
+        confirmed: Callable[[dict[str, Any]], bool],
+    ) -> None:
+        """Track an optimistic state and start confirmation polling.
+
+        Confirmation only polls the light weight state info call, instead of
+        a full refresh of every site, partition and notification.
+        """
+        self._expectations[context] = confirmed
+        self._confirm_deadline = time.monotonic() + CONFIRM_TIMEOUT
+        self._async_update_contexts({context})
+
+        if self._confirm_task is None or self._confirm_task.done():
+            self._confirm_task = self.hass.async_create_background_task(
+                self._async_confirm(), f"{DOMAIN} command confirmation"
+            )
+
+    async def _async_confirm(self) -> None:
+        """Poll state info until all expected states show up or time runs out."""
+        while self._expectations and time.monotonic() < self._confirm_deadline:
+            await asyncio.sleep(CONFIRM_INTERVAL)
+
+            try:
+                async with timeout(self._api_timeout):
+                    state_info = await self.hyyp_client.get_state_info()
+
+            except (asyncio.TimeoutError, HyypApiError) as err:
+                _LOGGER.debug("Failed to poll state for confirmation: %s", err)
+                continue
+
+            self._expectations = {
+                context: confirmed
+                for context, confirmed in self._expectations.items()
+                if not confirmed(state_info)
+            }
+            for context in self._confirmed.keys() - self._expectations.keys():
+                del self._confirmed[context]
+            self._async_update_contexts(
+                self.data.apply_state(state_info, skip=self._expectations)
+            )
+
+        if self._expectations:
+            _LOGGER.debug("Unconfirmed commands for %s", list(self._expectations))
+            self._expectations.clear()
+            # Show the last confirmed state until the refresh tells otherwise.
+            self._async_update_contexts(self.data.replace_records(self._confirmed))
+            self._confirmed.clear()
+            self.async_poll_fast()
+            await self.async_request_refresh()
+
+    @callback
+    def _async_update_contexts(self, contexts: set[tuple[Any, ...]]) -> None:
+        """Update listeners of the given contexts only."""
+        if not contexts:
+            return
+
+        for update_callback, context in list(self._listeners.values()):
+            if context in contexts:
+                update_callback()
+
+    def _next_update_interval(self, data: HyypSnapshot, changed: bool) -> timedelta:
+        """Return the polling interval suited to the latest data.
+
+        Poll fast right after a command or while any partition is in alarm,
+        at the normal rate while anything is armed and back off gradually
+        while every site stays disarmed and unchanged.
+        """
+        partitions = data.partitions.values()
+
+        if time.monotonic() < self._fast_poll_until or any(
+            partition.alarm for partition in partitions
+        ):
+            self._idle_polls = 0
+            return timedelta(seconds=FAST_POLL_INTERVAL)
+
+        if changed or any(partition.armed for partition in partitions):
+            self._idle_polls = 0
+            return timedelta(seconds=DEFAULT_POLL_INTERVAL)
+
+        self._idle_polls += 1
+        return timedelta(
+            seconds=min(
+                DEFAULT_POLL_INTERVAL * 2**self._idle_polls, IDLE_POLL_INTERVAL
+            )
+        )
+
+    async def _async_site_notifications(self, site_id: Any) -> list[dict[str, Any]]:
+        """Fetch the notifications of a site back to its recorded history."""
+        return await self.history.async_complete(
+            site_id,
+            await self.hyyp_client.site_notifications(site_id),
+            partial(self.hyyp_client.site_notifications, site_id),
+        )
+
+    async def _async_fetch_site_notifications(
+        self, site_id: Any
+    ) -> list[dict[str, Any]] | None:
+        """Fetch the notifications of one site within its own timeout.
+
+        Returns None while the site is backing off or when the fetch failed.
+        """
+        shard = self._shards.setdefault(site_id, HyypSiteShard())
+
+        if time.monotonic() < shard.retry_at:
+            return None
+
         try:
             async with timeout(self._api_timeout):
-                return await self.hass.async_add_executor_job(
-                    self.hyyp_client.load_alarm_infos
+                notifications = await self._async_site_notifications(site_id)
+
+        except (asyncio.TimeoutError, HyypApiError) as err:
+            shard.failed(err)
+            _LOGGER.debug(
+                "Failed to fetch notices of site %s (%s failures): %s",
+                site_id,
+                shard.failures,
+                shard.last_error,
+            )
+            return None
+
+        shard.succeeded()
+
+        return notifications
+
+    async def _async_fetch(self) -> tuple[HyypSnapshot, dict[Any, list[Any]]]:
+        """Fetch account infos and every site's notifications.
+
+        Returns the snapshot and the notifications by site id.
+        """
+        async with timeout(self._api_timeout):
+            sites = await self.hyyp_client.load_site_infos()
+            notifications = dict(
+                zip(
+                    sites,
+                    await asyncio.gather(
+                        *(self._async_site_notifications(site_id) for site_id in sites)
+                    ),
+                )
+            )
+
+        return _build_snapshot(sites, notifications), notifications
+
+    async def _async_fetch_sharded(self) -> tuple[HyypSnapshot, dict[Any, list[Any]]]:
+        """Fetch account infos, then every site's notifications independently.
+
+        A site whose notice fetch fails keeps its previous notice, with its
+        notice sensors unavailable, instead of failing the whole refresh.
+        """
+        async with timeout(self._api_timeout):
+            sites = await self.hyyp_client.load_site_infos()
+
+        results = await asyncio.gather(
+            *(self._async_fetch_site_notifications(site_id) for site_id in sites)
+        )
+        notifications = {}
+
+        for site_id, raw_site, site_notifications in zip(
+            sites, sites.values(), results
+        ):
+            if site_notifications is not None:
+                raw_site.update(format_last_notice(site_notifications))
+                notifications[site_id] = site_notifications
+            elif self.data and (previous := self.data.sites.get(site_id)):
+                raw_site["lastNoticeTime"] = previous.last_notice_time
+                raw_site["lastNoticeName"] = previous.last_notice_name
+
+        data = HyypSnapshot.from_api(sites)
+
+        for site_id, site in data.sites.items():
+            site.notices_available = not self._shards[site_id].failures
+
+        return data, notifications
+
+    @callback
+    def _async_handle_notices(
+        self, data: HyypSnapshot, notifications: dict[Any, list[Any]]
+    ) -> None:
+        """Record notices, fire an event for each new one and refetch sites.
+
+        A new notice often precedes the partition state it reports, e.g. an
+        alarm, so its site is fetched again shortly and polled fast.
+        """
+        site_ids = set()
+
+        for site_id, site_notifications in notifications.items():
+            for notice in self.history.async_add(site_id, site_notifications):
+                site_ids.add(site_id)
+                self.hass.bus.async_fire(
+                    EVENT_NOTICE,
+                    {ATTR_SITE_ID: site_id, ATTR_SITE_NAME: data.sites[site_id].name}
+                    | notice,
                 )
 
-        except (InvalidURL, HTTPError, HyypApiError) as error:
+        if not site_ids or self.data is None:
+            return
+
+        self.async_poll_fast()
+
+        if self._notice_task is not None:
+            self._notice_task.cancel()
+
+        self._notice_task = self.hass.async_create_background_task(
+            self._async_fetch_noticed_sites(site_ids), f"{DOMAIN} notice fetch"
+        )
+
+    async def _async_fetch_noticed_sites(self, site_ids: set[Any]) -> None:
+        """Update partitions and zones of sites with a new notice."""
+        await asyncio.sleep(CONFIRM_INTERVAL)
+
+        try:
+            self.breaker.check()
+            async with timeout(self._api_timeout):
+                sites = await self.hyyp_client.load_site_infos()
+
+        except (asyncio.TimeoutError, HyypApiError) as err:
+            _LOGGER.debug("Failed to fetch sites %s after a notice: %s", site_ids, err)
+            return
+
+        changed = self.data.update_partitions(
+            HyypSnapshot.from_api(
+                {site_id: sites[site_id] for site_id in site_ids if site_id in sites}
+            ),
+            skip=self._expectations,
+        )
+
+        if changed:
+            self._store.async_delay_save(self._data_to_store, STORAGE_SAVE_DELAY)
+            self._async_update_contexts(changed)
+
+    def _within_stale_budget(self) -> bool:
+        """Return True if the last good data may still be served.
+
+        The budget runs out after stale_polls failed polls or stale_time
+        seconds without a successful one, whichever comes first.
+        """
+        return (
+            self.data is not None
+            and self._failed_polls <= self.stale_polls
+            and time.monotonic() - self._last_success <= self.stale_time
+        )
+
+    def _poll_failed(self, error: Exception) -> HyypSnapshot:
+        """Back off after a failed poll and serve stale data if in budget.
+
+        Polls refused by the open circuit count toward the stale budget, but
+        not as another api failure that lengthens the backoff.
+        """
+        self._failed_polls += 1
+        if not isinstance(error, HyypCircuitOpenError):
+            self.update_interval = timedelta(seconds=self.breaker.failed(error))
+
+        if not self._within_stale_budget():
+            if isinstance(error, asyncio.TimeoutError):
+                raise error
             raise UpdateFailed(f"Invalid response from API: {error}") from error
+
+        _LOGGER.debug(
+            "Serving stale data after %s failed polls: %s", self._failed_polls, error
+        )
+        # Entities stay available, only write them when they turn stale.
+        self._changed_contexts = None if not self.stale else set()
+        self.stale = True
+
+        return self.data
+
+    async def _async_refresh(
+        self,
+        log_failures: bool = True,
+        raise_on_auth_failed: bool = False,
+        scheduled: bool = False,
+        raise_on_entry_error: bool = False,
+    ) -> None:
+        """Refresh data, profiling the cycle while a profiler is attached."""
+        if (profiler := self.profiler) is None:
+            await super()._async_refresh(
+                log_failures, raise_on_auth_failed, scheduled, raise_on_entry_error
+            )
+            return
+
+        with profiler.cycle():
+            await super()._async_refresh(
+                log_failures, raise_on_auth_failed, scheduled, raise_on_entry_error
+            )
+
+        if profiler.finished:
+            self.profiler = None
+            try:
+                await self.workers.async_run(profiler.save)
+            except (OSError, HomeAssistantError) as err:
+                _LOGGER.warning("Failed to write the profile: %s", err)
+                return
+
+            _LOGGER.info(
+                "Profiled %s refreshes to %s and %s",
+                len(profiler.durations),
+                profiler.stats_path,
+                profiler.summary_path,
+            )
+
+    async def _async_update_data(self) -> HyypSnapshot:
+        """Fetch data from IDS Hyyp."""
+        started = time.monotonic()
+        received = self.telemetry.bytes_received
+
+        try:
+            self.breaker.check(probe=True)
+
+            if self.per_site_fetch:
+                data, notifications = await self._async_fetch_sharded()
+            else:
+                data, notifications = await self._async_fetch()
+
+        except HyypAuthError as error:
+            # Stale data won't help, the credentials need to be updated.
+            self.telemetry.failed(OPERATION_REFRESH, error)
+            raise ConfigEntryAuthFailed(str(error)) from error
+
+        except (asyncio.TimeoutError, HyypApiError) as error:
+            self.telemetry.failed(OPERATION_REFRESH, error)
+            return self._poll_failed(error)
+
+        self.telemetry.refresh_done(
+            time.monotonic() - started, self.telemetry.bytes_received - received
+        )
+
+        if recovered := self.breaker.succeeded():
+            _LOGGER.info("IDS Hyyp cloud is reachable again")
+
+        self._failed_polls = 0
+        self._last_success = time.monotonic()
+        self.last_successful_update = dt_util.utcnow()
+        self._async_save_token()
+
+        # Keep showing optimistic state while commands await confirmation.
+        if self._expectations:
+            self._confirmed.update(data.carry_over(self.data, self._expectations))
+
+        changed = data.changed_contexts(self.data)
+        self._async_track_keys(data)
+        self._async_handle_notices(data, notifications)
+        # Return to the regular schedule right after an outage.
+        self.update_interval = self._next_update_interval(
+            data, bool(changed) or recovered
+        )
+
+        if changed:
+            self._store.async_delay_save(self._data_to_store, STORAGE_SAVE_DELAY)
+
+        # After a failed refresh every entity changes availability, and the
+        # first live refresh clears the stale flag, so only narrow the fan-out
+        # when the previous refresh succeeded on live data.
+        self._changed_contexts = (
+            changed if self.last_update_success and not self.stale else None
+        )
+        self.stale = False
+
+        return data
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Update listeners whose site, partition or zone data changed.
+
+        Listeners without a context are always updated. Afterwards entities
+        are added and removed for keys that appeared or disappeared.
+        """
+        changed = self._changed_contexts
+        self._changed_contexts = None
+        started = time.monotonic()
+
+        if changed is None:
+            notified = len(self._listeners)
+            super().async_update_listeners()
+
+        else:
+            notified = 0
+            for update_callback, context in list(self._listeners.values()):
+                if context is None or context in changed:
+                    notified += 1
+                    update_callback()
+
+        # Entities write their state from the update callback.
+        self.telemetry.listeners_updated(notified, time.monotonic() - started)
+
+        self._async_update_entities()
+
+
+def _build_snapshot(
+    sites: dict[Any, Any], notifications: dict[Any, list[Any]]
+) -> HyypSnapshot:
+    """Return the snapshot of site infos and the notifications by site id."""
+    for site_id, site_notifications in notifications.items():
+        sites[site_id].update(format_last_notice(site_notifications))
+
+    return HyypSnapshot.from_api(sites)
+
+
+class HyypSiteShard:
+    """Fetch error state and backoff of one site."""
+
+    __slots__ = ("failures", "last_error", "retry_at")
+
+    def __init__(self) -> None:
+        """Initialize a healthy shard."""
+        self.failures = 0
+        self.last_error: str | None = None
+        self.retry_at = 0.0
+
+    def failed(self, err: Exception) -> None:
+        """Record a failure and back off exponentially."""
+        self.failures += 1
+        self.last_error = str(err) or type(err).__name__
+        self.retry_at = time.monotonic() + backoff_delay(self.failures)
+
+    def succeeded(self) -> None:
+        """Reset the shard after a successful fetch."""
+        self.failures = 0
+        self.last_error = None
+        self.retry_at = 0.0
@@ -0,0 +1,51 @@
+"""Diagnostics support for IDS Hyyp."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_EMAIL, CONF_PASSWORD, CONF_TOKEN
+from homeassistant.core import HomeAssistant
+
+from .const import ATTR_ARM_CODE, ATTR_BYPASS_CODE, DATA_COORDINATOR, DOMAIN
+from .coordinator import HyypDataUpdateCoordinator
+
+TO_REDACT = {
+    CONF_EMAIL,
+    CONF_PASSWORD,
+    CONF_TOKEN,
+    ATTR_ARM_CODE,
+    ATTR_BYPASS_CODE,
+}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    coordinator: HyypDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id][
+        DATA_COORDINATOR
+    ]
+    last_update = coordinator.last_successful_update
+
+    return {
+        "entry": {
+            "data": async_redact_data(entry.data, TO_REDACT),
+            "options": async_redact_data(entry.options, TO_REDACT),
+        },
+        "coordinator": {
+            "update_interval": coordinator.update_interval
+            and coordinator.update_interval.total_seconds(),
+            "last_update_success": coordinator.last_update_success,
+            "last_successful_update": last_update and last_update.isoformat(),
+            "stale": coordinator.stale,
+            "failed_requests_in_a_row": coordinator.breaker.failures,
+            "last_error": coordinator.breaker.last_error,
+            "sites": len(coordinator.data.sites),
+            "partitions": len(coordinator.data.partitions),
+            "zones": len(coordinator.data.zones),
+        },
+        "telemetry": coordinator.telemetry.as_dict(),
+        "workers": coordinator.workers.as_dict(),
+    }
@@ -6,8 +6,15 @@ from typing import Any
 from homeassistant.helpers.entity import DeviceInfo, Entity
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from .const import DOMAIN, MANUFACTURER, MODEL
+from .const import (
+    ATTR_LAST_SUCCESSFUL_UPDATE,
+    ATTR_STALE,
+    DOMAIN,
+    MANUFACTURER,
+    MODEL,
+)
 from .coordinator import HyypDataUpdateCoordinator
+from .models import HyypPartition, HyypSite
 
 
 class HyypSiteEntity(CoordinatorEntity[HyypDataUpdateCoordinator], Entity):
@@ -17,21 +24,48 @@ class HyypSiteEntity(CoordinatorEntity[HyypDataUpdateCoordinator], Entity):
         self,
         coordinator: HyypDataUpdateCoordinator,
         site_id: int,
+        context: tuple[Any, ...] | None = None,
     ) -> None:
-        """Initialize the entity."""
-        super().__init__(coordinator)
+        """Initialize the entity.
+
+        The context selects the slice of coordinator data this entity is
+        updated for, see HyypDataUpdateCoordinator.async_update_listeners.
+        """
+        super().__init__(coordinator, context)
         self._site_id = site_id
         self._attr_device_info = DeviceInfo(
             identifiers={(DOMAIN, str(self._site_id))},
             manufacturer=MANUFACTURER,
             model=MODEL,
-            name=self.data["name"],
+            name=self.data.name,
         )
 
     @property
-    def data(self) -> Any:
+    def exists(self) -> bool:
+        """Return True while the site is part of the coordinator data."""
+        return self._site_id in self.coordinator.data.sites
+
+    @property
+    def available(self) -> bool:
+        """Return True if entity is available."""
+        return super().available and self.exists
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Flag state served from the cache or after failed polls."""
+        if not self.coordinator.stale:
+            return {ATTR_STALE: False}
+
+        last_update = self.coordinator.last_successful_update
+        return {
+            ATTR_STALE: True,
+            ATTR_LAST_SUCCESSFUL_UPDATE: last_update and last_update.isoformat(),
+        }
+
+    @property
+    def data(self) -> HyypSite:
         """Return coordinator data for this entity."""
-        return self.coordinator.data[self._site_id]
+        return self.coordinator.data.sites[self._site_id]
 
 
 class HyypPartitionEntity(HyypSiteEntity):
@@ -42,12 +76,21 @@ class HyypPartitionEntity(HyypSiteEntity):
         coordinator: HyypDataUpdateCoordinator,
         site_id: int,
         partition_id: int,
+        zone_id: str | None = None,
     ) -> None:
         """Initialize the entity."""
-        super().__init__(coordinator, site_id)
+        super().__init__(coordinator, site_id, (site_id, partition_id, zone_id))
         self._partition_id = partition_id
 
     @property
-    def partition_data(self) -> Any:
+    def exists(self) -> bool:
+        """Return True while the partition or zone is in the coordinator data."""
+        site_id, partition_id, zone_id = self.coordinator_context
+        if zone_id is None:
+            return (site_id, partition_id) in self.coordinator.data.partitions
+        return self.coordinator_context in self.coordinator.data.zones
+
+    @property
+    def partition_data(self) -> HyypPartition:
         """Return partition coordinator data for this entity."""
-        return self.coordinator.data[self._site_id]["partitions"][self._partition_id]
+        return self.coordinator.data.partitions[(self._site_id, self._partition_id)]
@@ -0,0 +1,146 @@
+"""Notice history of IDS Hyyp sites."""
+from __future__ import annotations
+
+from collections import deque
+from collections.abc import Awaitable, Callable
+from datetime import datetime
+from typing import Any
+
+from pyhyypapi.constants import EventNumber
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import (
+    ATTR_EVENT_NUMBER,
+    ATTR_NOTICE_NAME,
+    ATTR_NOTICE_TIME,
+    ATTR_TIMESTAMP,
+    NOTICE_HISTORY_SIZE,
+    NOTICE_MAX_PAGES,
+    STORAGE_SAVE_DELAY,
+)
+from .storage import async_get_store, notices_store_key
+
+
+def _notice_record(notification: dict[str, Any]) -> dict[str, Any]:
+    """Return the history record of an api notification."""
+    event_number = str(notification["eventNumber"])
+
+    return {
+        ATTR_TIMESTAMP: notification["timestamp"],
+        ATTR_EVENT_NUMBER: event_number,
+        ATTR_NOTICE_TIME: str(
+            datetime.fromtimestamp(notification["timestamp"] / 1000)
+        ),  # Epoch in ms
+        ATTR_NOTICE_NAME: EventNumber.get(event_number, event_number),
+    }
+
+
+class HyypNoticeHistory:
+    """Bounded notice history of the sites of a config entry.
+
+    Keeps the last NOTICE_HISTORY_SIZE notices per site, newest first, in a
+    Store. Notices are identified by timestamp and event number, so
+    overlapping fetches and restarts never record a notice twice.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        """Initialize an empty history."""
+        self._store = async_get_store(hass, notices_store_key(entry_id))
+        self._notices: dict[str, deque[dict[str, Any]]] = {}
+
+    async def async_load(self) -> None:
+        """Load the stored history."""
+        if stored := await self._store.async_load():
+            self._notices = {
+                site_key: deque(notices, maxlen=NOTICE_HISTORY_SIZE)
+                for site_key, notices in stored["sites"].items()
+            }
+
+    async def async_save(self) -> None:
+        """Write the history now instead of after the save delay."""
+        await self._store.async_save(self._data_to_store())
+
+    @callback
+    def _data_to_store(self) -> dict[str, Any]:
+        """Return the history to store."""
+        return {
+            "sites": {
+                site_key: list(notices) for site_key, notices in self._notices.items()
+            }
+        }
+
+    def notices(self, site_id: Any, limit: int | None = None) -> list[dict[str, Any]]:
+        """Return the recorded notices of a site, newest first."""
+        return list(self._notices.get(str(site_id), ()))[:limit]
+
+    async def async_complete(
+        self,
+        site_id: Any,
+        notifications: list[dict[str, Any]],
+        fetch_older: Callable[[int], Awaitable[list[dict[str, Any]]]],
+    ) -> list[dict[str, Any]]:
+        """Page back through older notifications up to the recorded history.
+
+        Only needed when more notices happened since the last fetch than one
+        page holds. At most NOTICE_MAX_PAGES extra pages are fetched.
+        """
+        if not (recorded := self._notices.get(str(site_id))):
+            return notifications
+
+        newest = recorded[0][ATTR_TIMESTAMP]
+
+        for _ in range(NOTICE_MAX_PAGES):
+            if not notifications or notifications[-1]["timestamp"] <= newest:
+                break
+
+            oldest = notifications[-1]["timestamp"]
+            older = [
+                notification
+                for notification in await fetch_older(oldest)
+                if notification["timestamp"] < oldest
+            ]
+            if not older:
+                break
+
+            notifications = notifications + older
+
+        return notifications
+
+    @callback
+    def async_add(
+        self, site_id: Any, notifications: list[dict[str, Any]]
+    ) -> list[dict[str, Any]]:
+        """Record notifications of a site, newest first.
+
+        Returns the notices not seen before, oldest first. The first
+        notifications of a site only seed its history and return nothing.
+        """
+        site_key = str(site_id)
+        seeded = site_key in self._notices
+        recorded = self._notices.setdefault(site_key, deque(maxlen=NOTICE_HISTORY_SIZE))
+        newest = recorded[0][ATTR_TIMESTAMP] if recorded else None
+        seen = {
+            (notice[ATTR_TIMESTAMP], notice[ATTR_EVENT_NUMBER])
+            for notice in recorded
+            if notice[ATTR_TIMESTAMP] == newest
+        }
+        new = []
+
+        for notification in reversed(notifications):
+            notice = _notice_record(notification)
+
+            # Older notices are recorded already or fell out of the history.
+            if newest is not None and (
+                notice[ATTR_TIMESTAMP] < newest
+                or (notice[ATTR_TIMESTAMP], notice[ATTR_EVENT_NUMBER]) in seen
+            ):
+                continue
+
+            recorded.appendleft(notice)
+            new.append(notice)
+
+        if new or not seeded:
+            self._store.async_delay_save(self._data_to_store, STORAGE_SAVE_DELAY)
+
+        return new if seeded else []
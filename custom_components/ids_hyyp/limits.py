@@ -0,0 +1,116 @@
+"""Per package request rate limiting and de-duplication for IDS Hyyp."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from functools import partial
+from typing import Any, TypeVar
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+
+from .const import CONF_PKG, DATA_REQUEST_GATES, REQUEST_BURST, REQUEST_RATE
+
+_T = TypeVar("_T")
+
+
+class TokenBucket:
+    """Token bucket allowing bursts of capacity requests at rate per second."""
+
+    def __init__(self, rate: float, capacity: int) -> None:
+        """Initialize a full bucket."""
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = asyncio.get_running_loop().time()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """Wait until a token is available and take it, first come first served."""
+        loop = asyncio.get_running_loop()
+
+        async with self._lock:
+            while True:
+                now = loop.time()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class HyypRequestGate:
+    """Rate limit and de-duplicate the api requests of one package.
+
+    Shared by the clients of every entry of the same package, i.e. the same
+    cloud tenant, whether it serves a coordinator poll, command confirmation
+    or a command. Only identical requests, token included, share a call.
+    """
+
+    def __init__(self, rate: float = REQUEST_RATE, burst: int = REQUEST_BURST) -> None:
+        """Initialize the gate."""
+        self.bucket = TokenBucket(rate, burst)
+        self.entry_ids: set[str] = set()
+        self._in_flight: dict[Hashable, asyncio.Task[Any]] = {}
+
+    async def acquire(self) -> None:
+        """Wait for the rate limit to allow another request."""
+        await self.bucket.acquire()
+
+    async def run(self, key: Hashable, call: Callable[[], Awaitable[_T]]) -> _T:
+        """Run call, or join the in-flight call with the same key.
+
+        The call runs in its own task, so a caller that gives up (e.g. on
+        timeout) doesn't cancel it for the callers that joined it.
+        """
+        if (task := self._in_flight.get(key)) is None:
+            task = self._in_flight[key] = asyncio.get_running_loop().create_task(call())
+            task.add_done_callback(partial(self._call_done, key))
+
+        return await asyncio.shield(task)
+
+    def _call_done(self, key: Hashable, task: asyncio.Task[Any]) -> None:
+        """Forget a finished call."""
+        del self._in_flight[key]
+
+        # Retrieve the exception in case every caller gave up on the call.
+        if not task.cancelled():
+            task.exception()
+
+
+@callback
+def async_get_request_gate(hass: HomeAssistant, entry: ConfigEntry) -> HyypRequestGate:
+    """Return the request gate shared by the entries of the entry's package.
+
+    The gate is released when the entry unloads and dropped with its last entry.
+    """
+    gates: dict[str, HyypRequestGate] = hass.data.setdefault(DATA_REQUEST_GATES, {})
+    pkg = entry.data[CONF_PKG]
+
+    if (gate := gates.get(pkg)) is None:
+        gate = gates[pkg] = HyypRequestGate()
+
+    gate.entry_ids.add(entry.entry_id)
+    entry.async_on_unload(partial(_async_release_request_gate, hass, pkg, entry))
+
+    return gate
+
+
+@callback
+def _async_release_request_gate(
+    hass: HomeAssistant, pkg: str, entry: ConfigEntry
+) -> None:
+    """Release the gate of an unloaded entry, dropping it once unused."""
+    gates: dict[str, HyypRequestGate] = hass.data.get(DATA_REQUEST_GATES, {})
+
+    if (gate := gates.get(pkg)) is None:
+        return
+
+    gate.entry_ids.discard(entry.entry_id)
+    if not gate.entry_ids:
+        del gates[pkg]
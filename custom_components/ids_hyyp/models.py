@@ -0,0 +1,383 @@
+"""Compact IDS Hyyp data model built once per coordinator refresh."""
+from __future__ import annotations
+
+from collections.abc import Container, Iterable
+from typing import Any
+
+# Site level api keys exposed by sensors, mapped to HyypSite attributes.
+SITE_FIELDS = {
+    "name": "name",
+    "isOnline": "is_online",
+    "isMaster": "is_master",
+    "hasPin": "has_pin",
+    "imei": "imei",
+    "lastNoticeTime": "last_notice_time",
+    "lastNoticeName": "last_notice_name",
+}
+NOTICE_KEYS = ("lastNoticeTime", "lastNoticeName")
+
+
+class _Record:
+    """Base for slotted records compared field by field."""
+
+    __slots__: tuple[str, ...] = ()
+
+    def __eq__(self, other: object) -> bool:
+        """Return True if other is the same record type with equal fields."""
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(
+            getattr(self, slot) == getattr(other, slot) for slot in self.__slots__
+        )
+
+    def __repr__(self) -> str:
+        """Return the record fields."""
+        fields = ", ".join(f"{slot}={getattr(self, slot)!r}" for slot in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+
+class HyypZone(_Record):
+    """A zone of a partition."""
+
+    __slots__ = ("id", "name", "bypassed")
+
+    def __init__(self, raw: dict[str, Any]) -> None:
+        """Initialize the zone from api data."""
+        self.id: Any = raw["id"]
+        self.name: str = raw["name"]
+        self.bypassed: bool = bool(raw["bypassed"])
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the zone in api layout."""
+        return {"id": self.id, "name": self.name, "bypassed": self.bypassed}
+
+
+class HyypPartition(_Record):
+    """A partition of a site."""
+
+    __slots__ = (
+        "id",
+        "name",
+        "alarm",
+        "armed",
+        "stay_armed",
+        "stay_armed_profile_name",
+        "stay_profiles",
+        "zone_ids",
+    )
+
+    def __init__(self, raw: dict[str, Any]) -> None:
+        """Initialize the partition from api data."""
+        self.id: Any = raw["id"]
+        self.name: str = raw["name"]
+        self.alarm: bool = bool(raw["alarm"])
+        self.armed: bool = bool(raw["armed"])
+        self.stay_armed: bool = bool(raw.get("stayArmed"))
+        self.stay_armed_profile_name: str | None = raw.get("stayArmedProfileName")
+        self.stay_profiles: tuple[tuple[Any, str], ...] = tuple(
+            (profile["id"], profile["name"]) for profile in raw["stayProfiles"].values()
+        )
+        self.zone_ids: tuple[Any, ...] = tuple(
+            zone["id"] for zone in raw["zones"].values()
+        )
+
+    @property
+    def stay_profile_ids(self) -> tuple[Any, ...]:
+        """Return the ids of the partition stay profiles."""
+        return tuple(profile_id for profile_id, _ in self.stay_profiles)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the partition in api layout, without zones."""
+        return {
+            "id": self.id,
+            "name": self.name,
+            "alarm": self.alarm,
+            "armed": self.armed,
+            "stayArmed": self.stay_armed,
+            "stayArmedProfileName": self.stay_armed_profile_name,
+            "stayProfiles": {
+                profile_id: {"id": profile_id, "name": name}
+                for profile_id, name in self.stay_profiles
+            },
+        }
+
+
+class HyypSite(_Record):
+    """A site (alarm panel) on the account."""
+
+    __slots__ = (
+        "id",
+        "name",
+        "is_online",
+        "is_master",
+        "has_pin",
+        "imei",
+        "last_notice_time",
+        "last_notice_name",
+        "notices_available",
+        "partition_ids",
+    )
+
+    def __init__(self, raw: dict[str, Any]) -> None:
+        """Initialize the site from api data."""
+        self.id: Any = raw["id"]
+        self.name: str = raw["name"]
+        self.is_online: bool | None = raw.get("isOnline")
+        self.is_master: bool | None = raw.get("isMaster")
+        self.has_pin: bool | None = raw.get("hasPin")
+        self.imei: str | None = raw.get("imei")
+        self.last_notice_time: str | None = raw.get("lastNoticeTime")
+        self.last_notice_name: str | None = raw.get("lastNoticeName")
+        self.notices_available: bool = True
+        self.partition_ids: tuple[Any, ...] = tuple(
+            partition["id"] for partition in raw["partitions"].values()
+        )
+
+    def value(self, key: str) -> Any:
+        """Return a site value by its api key."""
+        return getattr(self, SITE_FIELDS[key])
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the site in api layout, without partitions."""
+        return {"id": self.id} | {
+            key: getattr(self, attr) for key, attr in SITE_FIELDS.items()
+        }
+
+
+class HyypSnapshot:
+    """Records of one refresh with flat lookups by site, partition and zone."""
+
+    __slots__ = ("sites", "partitions", "zones")
+
+    def __init__(self) -> None:
+        """Initialize an empty snapshot."""
+        self.sites: dict[Any, HyypSite] = {}
+        self.partitions: dict[tuple[Any, Any], HyypPartition] = {}
+        self.zones: dict[tuple[Any, Any, Any], HyypZone] = {}
+
+    @classmethod
+    def from_api(cls, data: dict[Any, Any]) -> HyypSnapshot:
+        """Parse ``load_alarm_infos`` output into records."""
+        snapshot = cls()
+
+        for raw_site in data.values():
+            site = HyypSite(raw_site)
+            snapshot.sites[site.id] = site
+
+            for raw_partition in raw_site["partitions"].values():
+                partition = HyypPartition(raw_partition)
+                snapshot.partitions[(site.id, partition.id)] = partition
+
+                for raw_zone in raw_partition["zones"].values():
+                    zone = HyypZone(raw_zone)
+                    snapshot.zones[(site.id, partition.id, zone.id)] = zone
+
+        return snapshot
+
+    def as_dict(self) -> dict[Any, Any]:
+        """Return the snapshot in ``load_alarm_infos`` layout.
+
+        The result is json serializable and parses back with from_api.
+        """
+        data: dict[Any, Any] = {}
+
+        for site_id, site in self.sites.items():
+            raw_site = data[site_id] = site.as_dict()
+            raw_site["partitions"] = {}
+
+            for partition_id in site.partition_ids:
+                partition = self.partitions[(site_id, partition_id)]
+                raw_partition = raw_site["partitions"][
+                    partition_id
+                ] = partition.as_dict()
+                raw_partition["zones"] = {
+                    zone_id: self.zones[(site_id, partition_id, zone_id)].as_dict()
+                    for zone_id in partition.zone_ids
+                }
+
+        return data
+
+    def records_of(
+        self, context: tuple[Any, ...]
+    ) -> tuple[dict[Any, Any], tuple[Any, ...]]:
+        """Return the records holding a partition or zone context, and its key."""
+        site_id, partition_id, zone_id = context
+        if zone_id is None:
+            return self.partitions, (site_id, partition_id)
+        return self.zones, context
+
+    def carry_over(
+        self, previous: HyypSnapshot, contexts: Iterable[tuple[Any, ...]]
+    ) -> dict[tuple[Any, ...], HyypPartition | HyypZone]:
+        """Take partition and zone records of the given contexts from previous.
+
+        Returns the records that were replaced, by context.
+        """
+        replaced: dict[tuple[Any, ...], HyypPartition | HyypZone] = {}
+
+        for context in contexts:
+            records, key = self.records_of(context)
+            old_records, _ = previous.records_of(context)
+
+            if key in records and key in old_records:
+                replaced[context] = records[key]
+                records[key] = old_records[key]
+
+        return replaced
+
+    def replace_records(
+        self, records: dict[tuple[Any, ...], HyypPartition | HyypZone]
+    ) -> set[tuple[Any, ...]]:
+        """Replace partition and zone records by context in place.
+
+        Only records known to the snapshot are replaced. Returns the replaced
+        contexts.
+        """
+        replaced: set[tuple[Any, ...]] = set()
+
+        for context, record in records.items():
+            own_records, key = self.records_of(context)
+            if key in own_records:
+                own_records[key] = record
+                replaced.add(context)
+
+        return replaced
+
+    def with_records(
+        self, records: dict[tuple[Any, ...], HyypPartition | HyypZone]
+    ) -> HyypSnapshot:
+        """Return a copy with partition and zone records replaced by context."""
+        snapshot = HyypSnapshot()
+        snapshot.sites = self.sites
+        snapshot.partitions = dict(self.partitions)
+        snapshot.zones = dict(self.zones)
+        snapshot.replace_records(records)
+
+        return snapshot
+
+    def update_partitions(
+        self,
+        other: HyypSnapshot,
+        skip: Container[tuple[Any, ...]] = (),
+    ) -> set[tuple[Any, ...]]:
+        """Take changed partition and zone records from other in place.
+
+        Only records known to both snapshots are taken, contexts in skip are
+        left untouched. Returns the changed contexts.
+        """
+        changed: set[tuple[Any, ...]] = set()
+
+        for key, partition in other.partitions.items():
+            context = (*key, None)
+            if (
+                key in self.partitions
+                and context not in skip
+                and partition != self.partitions[key]
+            ):
+                self.partitions[key] = partition
+                changed.add(context)
+
+        for context, zone in other.zones.items():
+            if (
+                context in self.zones
+                and context not in skip
+                and zone != self.zones[context]
+            ):
+                self.zones[context] = zone
+                changed.add(context)
+
+        return changed
+
+    def apply_state(
+        self,
+        state_info: dict[str, Any],
+        skip: Container[tuple[Any, ...]] = (),
+    ) -> set[tuple[Any, ...]]:
+        """Apply armed and bypass state from ``get_state_info`` in place.
+
+        Contexts in skip are left untouched. Returns the changed contexts.
+        """
+        armed_partition_ids = set(state_info["armedPartitionIds"])
+        armed_stay_profile_ids = set(state_info["armedStayProfileIds"])
+        bypassed_zone_ids = set(state_info["bypassedZoneIds"])
+        changed: set[tuple[Any, ...]] = set()
+
+        for (site_id, partition_id), partition in self.partitions.items():
+            if (context := (site_id, partition_id, None)) in skip:
+                continue
+
+            armed = partition_id in armed_partition_ids
+            stay_armed_profile_name = next(
+                (
+                    name
+                    for profile_id, name in partition.stay_profiles
+                    if profile_id in armed_stay_profile_ids
+                ),
+                None,
+            )
+            stay_armed = stay_armed_profile_name is not None
+
+            if (
+                partition.armed,
+                partition.stay_armed,
+                partition.stay_armed_profile_name,
+            ) != (armed, stay_armed, stay_armed_profile_name):
+                partition.armed = armed
+                partition.stay_armed = stay_armed
+                partition.stay_armed_profile_name = stay_armed_profile_name
+                changed.add(context)
+
+        for context, zone in self.zones.items():
+            if context in skip:
+                continue
+
+            if zone.bypassed != (bypassed := zone.id in bypassed_zone_ids):
+                zone.bypassed = bypassed
+                changed.add(context)
+
+        return changed
+
+    def changed_contexts(self, previous: HyypSnapshot | None) -> set[tuple[Any, ...]]:
+        """Return the listener contexts whose data differs from previous.
+
+        Site values are keyed by ``(site_id, key)``, partitions by
+        ``(site_id, partition_id, None)`` and zones by
+        ``(site_id, partition_id, zone_id)``. Partitions and zones also change
+        when their site goes on- or offline, as that drives their availability.
+        """
+        if previous is None:
+            previous = HyypSnapshot()
+
+        changed: set[tuple[Any, ...]] = set()
+        online_changed: set[Any] = set()
+
+        for site_id in self.sites.keys() | previous.sites.keys():
+            site = self.sites.get(site_id)
+            old_site = previous.sites.get(site_id)
+
+            if site is None or old_site is None:
+                changed.update((site_id, key) for key in SITE_FIELDS)
+                online_changed.add(site_id)
+                continue
+
+            for key, attr in SITE_FIELDS.items():
+                if getattr(site, attr) != getattr(old_site, attr):
+                    changed.add((site_id, key))
+
+            if site.is_online != old_site.is_online:
+                online_changed.add(site_id)
+
+            if site.notices_available != old_site.notices_available:
+                changed.update((site_id, key) for key in NOTICE_KEYS)
+
+        for key in self.partitions.keys() | previous.partitions.keys():
+            partition = self.partitions.get(key)
+            if key[0] in online_changed or partition != previous.partitions.get(key):
+                changed.add((*key, None))
+
+        for zone_key in self.zones.keys() | previous.zones.keys():
+            zone = self.zones.get(zone_key)
+            if zone_key[0] in online_changed or zone != previous.zones.get(zone_key):
+                changed.add(zone_key)
+
+        return changed
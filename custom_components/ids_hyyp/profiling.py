@@ -0,0 +1,100 @@
+"""Profiling of IDS Hyyp coordinator cycles."""
+from __future__ import annotations
+
+from collections.abc import Iterator
+from contextlib import contextmanager
+import cProfile
+import time
+import tracemalloc
+
+from .const import PROFILE_TOP_ALLOCATIONS
+
+# Leave out the memory of the snapshots themselves.
+SNAPSHOT_FILTERS = (tracemalloc.Filter(False, tracemalloc.__file__),)
+
+
+def _take_snapshot() -> tracemalloc.Snapshot:
+    """Return a snapshot of the traced allocations."""
+    return tracemalloc.take_snapshot().filter_traces(SNAPSHOT_FILTERS)
+
+
+class HyypCycleProfiler:
+    """Profile CPU time and allocations of a number of coordinator cycles.
+
+    A cycle is a refresh including the listener fan-out it triggers. Work of
+    other tasks that runs while a cycle awaits the api is profiled as well.
+    """
+
+    def __init__(self, cycles: int, stats_path: str, summary_path: str) -> None:
+        """Initialize the profiler, writing its results to the given paths."""
+        self.remaining = cycles
+        self.stats_path = stats_path
+        self.summary_path = summary_path
+        self.durations: list[float] = []
+        self.profile = cProfile.Profile()
+        self._allocations: dict[str, list[int]] = {}
+        self._started_tracing = False
+
+    @property
+    def finished(self) -> bool:
+        """Return True once all cycles are profiled."""
+        return not self.remaining
+
+    @contextmanager
+    def cycle(self) -> Iterator[None]:
+        """Profile the cycle run in the context."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+
+        before = _take_snapshot()
+        started = time.monotonic()
+        self.profile.enable()
+        try:
+            yield
+        finally:
+            self.profile.disable()
+            self.durations.append(time.monotonic() - started)
+            self.remaining -= 1
+
+            for stat in _take_snapshot().compare_to(before, "lineno"):
+                if stat.size_diff > 0:
+                    totals = self._allocations.setdefault(str(stat.traceback), [0, 0])
+                    totals[0] += stat.size_diff
+                    totals[1] += stat.count_diff
+
+            if self.finished:
+                self.close()
+
+    def close(self) -> None:
+        """Stop tracing allocations if this profiler started it."""
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def allocation_summary(self) -> str:
+        """Return the top allocating lines of the profiled cycles."""
+        top = sorted(
+            self._allocations.items(), key=lambda item: item[1][0], reverse=True
+        )[:PROFILE_TOP_ALLOCATIONS]
+        lines = [
+            f"{len(self.durations)} cycles, "
+            + ", ".join(f"{duration:.3f}" for duration in self.durations)
+            + " s",
+            f"{sum(size for size, _ in self._allocations.values()) / 1024:.1f} KiB "
+            "net allocated by the cycles",
+            "",
+            "    KiB  blocks  line",
+        ]
+        lines.extend(
+            f"{size / 1024:7.1f}  {count:6d}  {line}" for line, (size, count) in top
+        )
+
+        return "\n".join(lines) + "\n"
+
+    def save(self) -> None:
+        """Write the cProfile stats and allocation summary, does blocking I/O."""
+        self.profile.dump_stats(self.stats_path)
+
+        with open(self.summary_path, "w", encoding="utf-8") as file:
+            file.write(self.allocation_summary())
@@ -0,0 +1,111 @@
+"""Failure backoff and circuit breaking for the IDS Hyyp cloud api."""
+from __future__ import annotations
+
+import random
+import time
+
+from pyhyypapi.exceptions import HyypApiError
+
+from .const import BREAKER_THRESHOLD, DEFAULT_POLL_INTERVAL, IDLE_POLL_INTERVAL
+
+
+def backoff_delay(
+    failures: int,
+    base: float = DEFAULT_POLL_INTERVAL,
+    cap: float = IDLE_POLL_INTERVAL,
+) -> float:
+    """Return the seconds to wait after consecutive failures.
+
+    The delay starts at base, the regular poll interval, and doubles per
+    failure up to cap. Up to a quarter more is added at random so instances
+    that failed together don't retry together.
+    """
+    delay = min(base * 2 ** max(failures - 1, 0), cap)
+    return delay + random.uniform(0, delay / 4)
+
+
+class HyypCircuitOpenError(HyypApiError):
+    """Request refused because the api is known to be down."""
+
+
+class HyypCircuitBreaker:
+    """Track consecutive api failures and block requests while the api is down.
+
+    The circuit opens after threshold consecutive failures. While open, calls
+    are refused until the backoff delay has passed, after which one probe, a
+    poll, may test the api again. The first success closes the circuit. A
+    probe that never reports back is given up after another backoff delay.
+    """
+
+    __slots__ = (
+        "threshold",
+        "failures",
+        "last_error",
+        "retry_at",
+        "probing",
+        "probe_until",
+    )
+
+    def __init__(self, threshold: int = BREAKER_THRESHOLD) -> None:
+        """Initialize a closed circuit."""
+        self.threshold = threshold
+        self.failures = 0
+        self.last_error: str | None = None
+        self.retry_at = 0.0
+        self.probing = False
+        self.probe_until = 0.0
+
+    @property
+    def is_open(self) -> bool:
+        """Return True if the api is considered down."""
+        return self.failures >= self.threshold
+
+    def allow(self, probe: bool = False) -> bool:
+        """Return True if a request may be sent now.
+
+        While open, only a probe is let through, once the backoff delay has
+        passed and no other probe is running.
+        """
+        if not self.is_open:
+            return True
+
+        now = time.monotonic()
+        if not probe or now < self.retry_at:
+            return False
+        # The probe holds the circuit half open until it reports back, or
+        # until one more backoff delay has passed without a result.
+        if self.probing and now < self.probe_until:
+            return False
+
+        self.probing = True
+        self.probe_until = now + backoff_delay(self.failures)
+        return True
+
+    def check(self, probe: bool = False) -> None:
+        """Raise if requests are currently refused."""
+        if not self.allow(probe):
+            raise HyypCircuitOpenError(
+                f"IDS Hyyp cloud unavailable after {self.failures} failed requests "
+                f"({self.last_error}), retrying in "
+                f"{max(self.retry_at - time.monotonic(), 0):.0f} s"
+            )
+
+    def failed(self, err: Exception) -> float:
+        """Record a failure and return the backoff delay in seconds."""
+        self.failures += 1
+        self.last_error = str(err) or type(err).__name__
+        self.probing = False
+        delay = backoff_delay(self.failures)
+        self.retry_at = time.monotonic() + delay
+
+        return delay
+
+    def succeeded(self) -> bool:
+        """Close the circuit, return True if it was open."""
+        was_open = self.is_open
+        self.failures = 0
+        self.last_error = None
+        self.retry_at = 0.0
+        self.probing = False
+
+        return was_open
@@ -1,16 +1,30 @@
 """Support for Hyyp sensors."""
 from __future__ import annotations
 
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
 from typing import Any
 
-from homeassistant.components.sensor import SensorEntity, SensorEntityDescription
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorEntityDescription,
+    SensorStateClass,
+)
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.const import EntityCategory, UnitOfInformation, UnitOfTime
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.device_registry import DeviceEntryType
+from homeassistant.helpers.entity import DeviceInfo
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.typing import StateType
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from .const import DATA_COORDINATOR, DOMAIN
+from .const import DATA_COORDINATOR, DOMAIN, MANUFACTURER, MODEL
 from .coordinator import HyypDataUpdateCoordinator
 from .entity import HyypSiteEntity
+from .models import NOTICE_KEYS
+from .telemetry import HyypTelemetry
 
 PARALLEL_UPDATES = 1
 
@@ -21,6 +35,67 @@ SENSOR_TYPES: dict[str, SensorEntityDescription] = {
 }
 
 
+@dataclass(frozen=True, kw_only=True)
+class HyypTelemetrySensorEntityDescription(SensorEntityDescription):
+    """Describes an IDS Hyyp telemetry sensor."""
+
+    value_fn: Callable[[HyypTelemetry], StateType]
+    attributes_fn: Callable[[HyypTelemetry], dict[str, Any]] | None = None
+
+
+TELEMETRY_SENSOR_TYPES: tuple[HyypTelemetrySensorEntityDescription, ...] = (
+    HyypTelemetrySensorEntityDescription(
+        key="refresh_duration",
+        name="Refresh duration",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.SECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=2,
+        value_fn=lambda telemetry: telemetry.last_refresh,
+    ),
+    HyypTelemetrySensorEntityDescription(
+        key="request_latency_p95",
+        name="Request latency p95",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.SECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=2,
+        value_fn=lambda telemetry: telemetry.requests.quantile(0.95),
+    ),
+    HyypTelemetrySensorEntityDescription(
+        key="request_failures",
+        name="Request failures",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda telemetry: sum(telemetry.request_failures.values()),
+        attributes_fn=lambda telemetry: telemetry.request_failures,
+    ),
+    HyypTelemetrySensorEntityDescription(
+        key="refresh_payload",
+        name="Refresh payload",
+        device_class=SensorDeviceClass.DATA_SIZE,
+        native_unit_of_measurement=UnitOfInformation.BYTES,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda telemetry: telemetry.last_payload,
+    ),
+    HyypTelemetrySensorEntityDescription(
+        key="entities_notified",
+        name="Entities notified",
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda telemetry: telemetry.last_notified,
+    ),
+    HyypTelemetrySensorEntityDescription(
+        key="state_write_time",
+        name="State write time",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=1,
+        value_fn=lambda telemetry: telemetry.last_state_write
+        and telemetry.last_state_write * 1000,
+    ),
+)
+
+
 async def async_setup_entry(
     hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback
 ) -> None:
@@ -29,14 +104,24 @@ async def async_setup_entry(
         DATA_COORDINATOR
     ]
 
+    @callback
+    def _async_add_sites(site_ids: Iterable[Any]) -> None:
+        """Add sensors for sites."""
+        async_add_entities(
+            [
+                HyypSensor(coordinator, site_id, sensor)
+                for site_id in site_ids
+                for sensor in SENSOR_TYPES
+                if coordinator.data.sites[site_id].value(sensor) is not None
+            ]
+        )
+
+    _async_add_sites(coordinator.data.sites)
+    entry.async_on_unload(coordinator.async_add_key_listener("sites", _async_add_sites))
+
     async_add_entities(
-        [
-            HyypSensor(coordinator, site_id, sensor)
-            for site_id in coordinator.data
-            for sensor, value in coordinator.data[site_id].items()
-            if sensor in SENSOR_TYPES
-            if value is not None
-        ]
+        HyypTelemetrySensor(coordinator, entry, description)
+        for description in TELEMETRY_SENSOR_TYPES
     )
 
 
@@ -52,13 +137,67 @@ class HyypSensor(HyypSiteEntity, SensorEntity):
         sensor: str,
     ) -> None:
         """Initialize the sensor."""
-        super().__init__(coordinator, site_id)
+        super().__init__(coordinator, site_id, (site_id, sensor))
         self._sensor_name = sensor
-        self._attr_name = f"{self.data['name']} {sensor.title()}"
+        self._attr_name = f"{self.data.name} {sensor.title()}"
         self._attr_unique_id = f"{self._site_id}_{sensor}"
         self.entity_description = SENSOR_TYPES[sensor]
 
+    @property
+    def available(self) -> bool:
+        """Return False while the notices of the site can't be fetched."""
+        return super().available and (
+            self._sensor_name not in NOTICE_KEYS or self.data.notices_available
+        )
+
     @property
     def native_value(self) -> Any:
         """Return the state of the sensor."""
-        return self.data[self._sensor_name]
+        return self.data.value(self._sensor_name)
+
+
+class HyypTelemetrySensor(CoordinatorEntity[HyypDataUpdateCoordinator], SensorEntity):
+    """Api and update cycle statistics of a config entry.
+
+    Values cover the previous refresh and listener fan-out. They stay
+    available while the api fails, to show the failures.
+    """
+
+    entity_description: HyypTelemetrySensorEntityDescription
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    def __init__(
+        self,
+        coordinator: HyypDataUpdateCoordinator,
+        entry: ConfigEntry,
+        description: HyypTelemetrySensorEntityDescription,
+    ) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator)
+        self.entity_description = description
+        self._attr_name = f"{entry.title} {description.name}"
+        self._attr_unique_id = f"{entry.entry_id}_{description.key}"
+        self._attr_device_info = DeviceInfo(
+            entry_type=DeviceEntryType.SERVICE,
+            identifiers={(DOMAIN, entry.entry_id)},
+            manufacturer=MANUFACTURER,
+            model=MODEL,
+            name=entry.title,
+        )
+
+    @property
+    def available(self) -> bool:
+        """Return True, telemetry is also of interest while the api fails."""
+        return True
+
+    @property
+    def native_value(self) -> StateType:
+        """Return the state of the sensor."""
+        return self.entity_description.value_fn(self.coordinator.telemetry)
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        """Return per type details of the value."""
+        if self.entity_description.attributes_fn is None:
+            return None
+        return self.entity_description.attributes_fn(self.coordinator.telemetry)
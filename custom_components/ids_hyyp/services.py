@@ -0,0 +1,500 @@
+"""Domain services for IDS Hyyp."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from datetime import datetime
+from functools import partial
+import logging
+from typing import Any
+
+from pyhyypapi.exceptions import HyypApiError
+import voluptuous as vol
+
+from homeassistant.const import Platform
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import (
+    config_validation as cv,
+    device_registry as dr,
+    entity_registry as er,
+)
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.service import async_extract_entity_ids
+
+from .cassette import HyypCassetteRecorder
+from .const import (
+    ARM_MODE_DISARM,
+    ARM_MODE_HOME,
+    ARM_MODES,
+    ATTR_ARM_CODE,
+    ATTR_BYPASS,
+    ATTR_BYPASS_CODE,
+    ATTR_CYCLES,
+    ATTR_DURATION,
+    ATTR_LIMIT,
+    ATTR_MAX_CONCURRENCY,
+    ATTR_MODE,
+    DATA_COORDINATOR,
+    DEFAULT_CASSETTE_DURATION,
+    DEFAULT_MAX_CONCURRENCY,
+    DEFAULT_PROFILE_CYCLES,
+    DOMAIN,
+    MAX_CASSETTE_DURATION,
+    MAX_CONCURRENCY,
+    MAX_PROFILE_CYCLES,
+    NOTICE_HISTORY_SIZE,
+    SERVICE_ARM_PARTITIONS,
+    SERVICE_BYPASS_ZONES,
+    SERVICE_GET_NOTICES,
+    SERVICE_PROFILE,
+    SERVICE_RECORD_CASSETTE,
+    STATUS_SUPERSEDED,
+    STATUS_UNCHANGED,
+)
+from .coordinator import HyypDataUpdateCoordinator
+from .profiling import HyypCycleProfiler
+
+_LOGGER = logging.getLogger(__name__)
+
+# Service jobs of a site, the entity id each job reports its outcome for
+_SiteJobs = list[tuple[str, Callable[[], Awaitable[dict[str, Any]]]]]
+
+BYPASS_ZONES_SCHEMA = cv.make_entity_service_schema(
+    {
+        vol.Optional(ATTR_BYPASS_CODE): cv.string,
+        vol.Optional(ATTR_BYPASS, default=True): cv.boolean,
+        vol.Optional(ATTR_MAX_CONCURRENCY, default=DEFAULT_MAX_CONCURRENCY): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=MAX_CONCURRENCY)
+        ),
+    }
+)
+
+ARM_PARTITIONS_SCHEMA = cv.make_entity_service_schema(
+    {
+        vol.Required(ATTR_MODE): vol.In(ARM_MODES),
+        vol.Optional(ATTR_ARM_CODE): cv.string,
+        vol.Optional(ATTR_MAX_CONCURRENCY, default=DEFAULT_MAX_CONCURRENCY): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=MAX_CONCURRENCY)
+        ),
+    }
+)
+
+GET_NOTICES_SCHEMA = cv.make_entity_service_schema(
+    {
+        vol.Optional(ATTR_LIMIT): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=NOTICE_HISTORY_SIZE)
+        ),
+    }
+)
+
+RECORD_CASSETTE_SCHEMA = cv.make_entity_service_schema(
+    {
+        vol.Optional(ATTR_DURATION, default=DEFAULT_CASSETTE_DURATION): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=MAX_CASSETTE_DURATION)
+        ),
+    }
+)
+
+PROFILE_SCHEMA = cv.make_entity_service_schema(
+    {
+        vol.Optional(ATTR_CYCLES, default=DEFAULT_PROFILE_CYCLES): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=MAX_PROFILE_CYCLES)
+        ),
+    }
+)
+
+
+def _async_resolve_entities(
+    hass: HomeAssistant, entity_ids: set[str], platform: Platform | None = None
+) -> dict[str, er.RegistryEntry]:
+    """Map Hyyp entity ids, of a platform if given, to their registry entries."""
+    registry = er.async_get(hass)
+    resolved: dict[str, er.RegistryEntry] = {}
+
+    for entity_id in entity_ids:
+        entry = registry.async_get(entity_id)
+
+        if (
+            entry is None
+            or entry.platform != DOMAIN
+            or (platform is not None and entry.domain != platform)
+            or entry.config_entry_id not in hass.data.get(DOMAIN, {})
+        ):
+            raise HomeAssistantError(
+                f"{entity_id} is not a loaded IDS Hyyp {platform or ''} entity"
+            )
+
+        resolved[entity_id] = entry
+
+    return resolved
+
+
+async def _async_run_per_site(
+    site_jobs: dict[Any, _SiteJobs],
+    max_concurrency: int,
+) -> dict[str, dict[str, Any]]:
+    """Run the jobs of each site in order, up to max_concurrency sites at once.
+
+    The command queue of a site sends one command at a time, so a site takes
+    one slot for all its jobs rather than a slot per job.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+    results: dict[str, dict[str, Any]] = {}
+
+    async def async_run_site(jobs: _SiteJobs) -> None:
+        async with semaphore:
+            for entity_id, job in jobs:
+                results[entity_id] = await job()
+
+    await asyncio.gather(*(async_run_site(jobs) for jobs in site_jobs.values()))
+
+    return {
+        entity_id: results[entity_id]
+        for jobs in site_jobs.values()
+        for entity_id, _ in jobs
+    }
+
+
+async def _async_bypass_zone(
+    coordinator: HyypDataUpdateCoordinator,
+    zone_key: tuple[Any, Any, Any],
+    bypass: bool,
+    code: str | None,
+) -> dict[str, Any]:
+    """Set the bypass state of one zone and return the outcome."""
+    site_id, partition_id, zone_id = zone_key
+
+    try:
+        update_ok = await coordinator.async_bypass_zone(
+            site_id, partition_id, zone_id, bypass=bypass, code=code
+        )
+
+    except (asyncio.TimeoutError, HyypApiError) as err:
+        return {"success": False, "error": str(err) or type(err).__name__}
+
+    if update_ok["status"] not in ("SUCCESS", STATUS_UNCHANGED):
+        return {
+            "success": False,
+            "status": update_ok["status"],
+            "error": str(update_ok.get("error")),
+        }
+
+    return {"success": True, "status": update_ok["status"]}
+
+
+async def _async_arm_partition(
+    coordinator: HyypDataUpdateCoordinator,
+    partition_key: tuple[Any, Any],
+    mode: str,
+    code: str | None,
+) -> dict[str, Any]:
+    """Arm, arm home or disarm one partition and return the outcome."""
+    site_id, partition_id = partition_key
+    stay_profile_ids = coordinator.data.partitions[partition_key].stay_profile_ids
+    stay_profile_id = None
+
+    if mode == ARM_MODE_HOME:
+        stay_profile_id = stay_profile_ids[0] if stay_profile_ids else 0
+
+    try:
+        update_ok = await coordinator.async_arm_partition(
+            site_id,
+            partition_id,
+            arm=mode != ARM_MODE_DISARM,
+            code=code,
+            stay_profile_id=stay_profile_id,
+            skip_unchanged=True,
+        )
+
+    except (asyncio.TimeoutError, HyypApiError) as err:
+        return {"success": False, "error": str(err) or type(err).__name__}
+
+    if update_ok["status"] not in ("SUCCESS", STATUS_SUPERSEDED, STATUS_UNCHANGED):
+        error = str(update_ok.get("error"))
+        if mode != ARM_MODE_DISARM:
+            error = f"Cannot arm, check for violated zones. {error}"
+        return {"success": False, "status": update_ok["status"], "error": error}
+
+    return {"success": True, "status": update_ok["status"]}
+
+
+async def _async_save_cassette(
+    coordinator: HyypDataUpdateCoordinator, path: str, _: datetime
+) -> None:
+    """Stop the recording of a coordinator's client and write its cassette."""
+    client = coordinator.hyyp_client
+    if (recorder := client.recorder) is None:
+        return
+
+    client.recorder = None
+    try:
+        await coordinator.workers.async_run(recorder.cassette.save, path)
+    except (OSError, HomeAssistantError) as err:
+        _LOGGER.warning("Failed to write the cassette %s: %s", path, err)
+        return
+
+    _LOGGER.info(
+        "Recorded %s api requests to %s", len(recorder.cassette.interactions), path
+    )
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register IDS Hyyp domain services."""
+
+    async def async_bypass_zones(call: ServiceCall) -> ServiceResponse:
+        """Bypass or unbypass a set of zones concurrently.
+
+        Up to max_concurrency sites get requests at a time, each site one
+        request at a time. Successful zones are confirmed together by one
+        state poll loop rather than a refresh each.
+        """
+        entities = _async_resolve_entities(
+            hass, await async_extract_entity_ids(hass, call), Platform.SWITCH
+        )
+        zone_keys: dict[str, dict[str, tuple[Any, Any, Any]]] = {}
+        site_jobs: dict[tuple[str, Any], _SiteJobs] = {}
+
+        for entity_id, registry_entry in entities.items():
+            entry_id = registry_entry.config_entry_id
+            assert entry_id
+            coordinator: HyypDataUpdateCoordinator = hass.data[DOMAIN][entry_id][
+                DATA_COORDINATOR
+            ]
+
+            if entry_id not in zone_keys:
+                zone_keys[entry_id] = {
+                    "_".join(map(str, zone_key)): zone_key
+                    for zone_key in coordinator.data.zones
+                }
+
+            if (zone_key := zone_keys[entry_id].get(registry_entry.unique_id)) is None:
+                raise HomeAssistantError(f"Zone of {entity_id} no longer exists")
+
+            code = call.data.get(ATTR_BYPASS_CODE, coordinator.bypass_code)
+            site_jobs.setdefault((entry_id, zone_key[0]), []).append(
+                (
+                    entity_id,
+                    partial(
+                        _async_bypass_zone,
+                        coordinator,
+                        zone_key,
+                        call.data[ATTR_BYPASS],
+                        code,
+                    ),
+                )
+            )
+
+        results = await _async_run_per_site(site_jobs, call.data[ATTR_MAX_CONCURRENCY])
+
+        if not call.return_response and (
+            failed := [
+                entity_id
+                for entity_id, result in results.items()
+                if not result["success"]
+            ]
+        ):
+            raise HomeAssistantError(f"Failed to bypass zones: {', '.join(failed)}")
+
+        return {"zones": results}
+
+    async def async_arm_partitions(call: ServiceCall) -> ServiceResponse:
+        """Arm, arm home or disarm a set of partitions concurrently.
+
+        Up to max_concurrency sites get requests at a time, each site one
+        request at a time. Accepted partitions are confirmed together by one
+        state poll loop rather than a refresh each.
+        """
+        entities = _async_resolve_entities(
+            hass,
+            await async_extract_entity_ids(hass, call),
+            Platform.ALARM_CONTROL_PANEL,
+        )
+        mode = call.data[ATTR_MODE]
+        partition_keys: dict[str, dict[str, tuple[Any, Any]]] = {}
+        site_jobs: dict[tuple[str, Any], _SiteJobs] = {}
+
+        for entity_id, registry_entry in entities.items():
+            entry_id = registry_entry.config_entry_id
+            assert entry_id
+            coordinator: HyypDataUpdateCoordinator = hass.data[DOMAIN][entry_id][
+                DATA_COORDINATOR
+            ]
+
+            if entry_id not in partition_keys:
+                partition_keys[entry_id] = {
+                    "_".join(map(str, partition_key)): partition_key
+                    for partition_key in coordinator.data.partitions
+                }
+
+            if (
+                partition_key := partition_keys[entry_id].get(registry_entry.unique_id)
+            ) is None:
+                raise HomeAssistantError(f"Partition of {entity_id} no longer exists")
+
+            code = call.data.get(ATTR_ARM_CODE, coordinator.arm_code)
+            site_jobs.setdefault((entry_id, partition_key[0]), []).append(
+                (
+                    entity_id,
+                    partial(
+                        _async_arm_partition, coordinator, partition_key, mode, code
+                    ),
+                )
+            )
+
+        results = await _async_run_per_site(site_jobs, call.data[ATTR_MAX_CONCURRENCY])
+
+        if not call.return_response and (
+            failed := [
+                entity_id
+                for entity_id, result in results.items()
+                if not result["success"]
+            ]
+        ):
+            action = "disarm" if mode == ARM_MODE_DISARM else "arm"
+            raise HomeAssistantError(
+                f"Failed to {action} partitions: {', '.join(failed)}"
+            )
+
+        return {"partitions": results}
+
+    async def async_get_notices(call: ServiceCall) -> ServiceResponse:
+        """Return the recorded notices of the sites of the target entities."""
+        device_registry = dr.async_get(hass)
+        sites: dict[str, Any] = {}
+
+        for entity_id, registry_entry in _async_resolve_entities(
+            hass, await async_extract_entity_ids(hass, call)
+        ).items():
+            device = (
+                device_registry.async_get(registry_entry.device_id)
+                if registry_entry.device_id
+                else None
+            )
+            if device is None or not (
+                site_ids := [
+                    identifier
+                    for domain, identifier in device.identifiers
+                    if domain == DOMAIN
+                ]
+            ):
+                raise HomeAssistantError(f"{entity_id} doesn't belong to a site")
+
+            coordinator: HyypDataUpdateCoordinator = hass.data[DOMAIN][
+                registry_entry.config_entry_id
+            ][DATA_COORDINATOR]
+            sites[site_ids[0]] = coordinator.history.notices(
+                site_ids[0], call.data.get(ATTR_LIMIT)
+            )
+
+        return {"sites": sites}
+
+    async def async_record_cassette(call: ServiceCall) -> ServiceResponse:
+        """Record the api traffic of the target entities' entries to cassettes.
+
+        Recording runs in the background for duration seconds, after which
+        each cassette is written to the config directory.
+        """
+        stamp = datetime.now().strftime("%Y%m%d%H%M%S")
+        paths: dict[str, str] = {}
+
+        for registry_entry in _async_resolve_entities(
+            hass, await async_extract_entity_ids(hass, call)
+        ).values():
+            entry_id = registry_entry.config_entry_id
+            assert entry_id
+            if entry_id in paths:
+                continue
+
+            coordinator: HyypDataUpdateCoordinator = hass.data[DOMAIN][entry_id][
+                DATA_COORDINATOR
+            ]
+            client = coordinator.hyyp_client
+            if client.recorder is not None:
+                raise HomeAssistantError(f"Already recording entry {entry_id}")
+
+            client.recorder = HyypCassetteRecorder()
+            paths[entry_id] = hass.config.path(
+                f"{DOMAIN}_{entry_id}_{stamp}.cassette.gz"
+            )
+            async_call_later(
+                hass,
+                call.data[ATTR_DURATION],
+                partial(_async_save_cassette, coordinator, paths[entry_id]),
+            )
+
+        return {"cassettes": paths}
+
+    async def async_profile(call: ServiceCall) -> ServiceResponse:
+        """Profile the next refreshes of the target entities' entry.
+
+        Only one entry is profiled at a time, the profiler is process wide.
+        """
+        entry_ids = {
+            registry_entry.config_entry_id
+            for registry_entry in _async_resolve_entities(
+                hass, await async_extract_entity_ids(hass, call)
+            ).values()
+        }
+        if len(entry_ids) != 1:
+            raise HomeAssistantError("Target entities of exactly one IDS Hyyp account")
+
+        coordinators: list[HyypDataUpdateCoordinator] = [
+            entry_data[DATA_COORDINATOR] for entry_data in hass.data[DOMAIN].values()
+        ]
+        if any(coordinator.profiler is not None for coordinator in coordinators):
+            raise HomeAssistantError("Already profiling IDS Hyyp refreshes")
+
+        entry_id = entry_ids.pop()
+        prefix = hass.config.path(
+            f"{DOMAIN}_{entry_id}_{datetime.now().strftime('%Y%m%d%H%M%S')}"
+        )
+        profiler = HyypCycleProfiler(
+            call.data[ATTR_CYCLES], f"{prefix}.prof", f"{prefix}_allocations.txt"
+        )
+        hass.data[DOMAIN][entry_id][DATA_COORDINATOR].profiler = profiler
+
+        return {"stats": profiler.stats_path, "allocations": profiler.summary_path}
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_PROFILE,
+        async_profile,
+        schema=PROFILE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_RECORD_CASSETTE,
+        async_record_cassette,
+        schema=RECORD_CASSETTE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GET_NOTICES,
+        async_get_notices,
+        schema=GET_NOTICES_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_ARM_PARTITIONS,
+        async_arm_partitions,
+        schema=ARM_PARTITIONS_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_BYPASS_ZONES,
+        async_bypass_zones,
+        schema=BYPASS_ZONES_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
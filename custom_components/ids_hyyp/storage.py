@@ -0,0 +1,41 @@
+"""Stores of IDS Hyyp config entries."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import DATA_STORES, DOMAIN, STORAGE_VERSION
+
+
+def snapshot_store_key(entry_id: str) -> str:
+    """Return the key of an entry's cached snapshot."""
+    return f"{DOMAIN}.{entry_id}"
+
+
+def notices_store_key(entry_id: str) -> str:
+    """Return the key of an entry's notice history."""
+    return f"{DOMAIN}.{entry_id}.notices"
+
+
+@callback
+def async_get_store(hass: HomeAssistant, key: str) -> Store[dict[str, Any]]:
+    """Return the Store of key, the same instance across entry reloads.
+
+    A reloaded entry then loads data an earlier setup has yet to write, and
+    removing the file cancels those pending writes.
+    """
+    stores: dict[str, Store[dict[str, Any]]] = hass.data.setdefault(DATA_STORES, {})
+
+    if (store := stores.get(key)) is None:
+        store = stores[key] = Store[dict[str, Any]](hass, STORAGE_VERSION, key)
+
+    return store
+
+
+async def async_remove_entry_stores(hass: HomeAssistant, entry_id: str) -> None:
+    """Remove the stored snapshot and notice history of an entry."""
+    for key in (snapshot_store_key(entry_id), notices_store_key(entry_id)):
+        await async_get_store(hass, key).async_remove()
+        hass.data[DATA_STORES].pop(key)
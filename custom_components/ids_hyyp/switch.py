@@ -1,6 +1,8 @@
 """Support for IDS Hyyp Switches."""
 from __future__ import annotations
 
+from collections.abc import Iterable
+from functools import partial
 from typing import Any
 
 from pyhyypapi.exceptions import HTTPError, HyypApiError
@@ -8,13 +10,15 @@ import voluptuous as vol
 
 from homeassistant.components.switch import SwitchDeviceClass, SwitchEntity
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers import entity_platform
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
 from .const import ATTR_BYPASS_CODE, DATA_COORDINATOR, DOMAIN, SERVICE_BYPASS_ZONE
 from .coordinator import HyypDataUpdateCoordinator
 from .entity import HyypPartitionEntity
+from .models import HyypZone
+from .resilience import HyypCircuitOpenError
 
 
 async def async_setup_entry(
@@ -24,18 +28,19 @@ async def async_setup_entry(
     coordinator: HyypDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id][
         DATA_COORDINATOR
     ]
-    bypass_code = entry.options.get(ATTR_BYPASS_CODE)
-
-    async_add_entities(
-        [
-            HyypSwitch(coordinator, site_id, partition_id, zone_id, bypass_code)
-            for site_id in coordinator.data
-            for partition_id in coordinator.data[site_id]["partitions"]
-            for zone_id in coordinator.data[site_id]["partitions"][partition_id][
-                "zones"
+
+    @callback
+    def _async_add_zones(zone_keys: Iterable[tuple[Any, Any, Any]]) -> None:
+        """Add switches for zones."""
+        async_add_entities(
+            [
+                HyypSwitch(coordinator, site_id, partition_id, zone_id)
+                for site_id, partition_id, zone_id in zone_keys
             ]
-        ]
-    )
+        )
+
+    _async_add_zones(coordinator.data.zones)
+    entry.async_on_unload(coordinator.async_add_key_listener("zones", _async_add_zones))
 
     platform = entity_platform.async_get_current_platform()
 
@@ -57,41 +62,54 @@ class HyypSwitch(HyypPartitionEntity, SwitchEntity):
         site_id: int,
         partition_id: int,
         zone_id: str,
-        bypass_code: str | None,
     ) -> None:
         """Initialize the switch."""
-        super().__init__(coordinator, site_id, partition_id)
-        self._bypass_code = bypass_code
+        super().__init__(coordinator, site_id, partition_id, zone_id)
         self._zone_id = zone_id
-        self._attr_name = f"{self.partition_data['zones'][zone_id]['name'].title()}"
+        self._attr_name = self.zone_data.name.title()
         self._attr_unique_id = f"{self._site_id}_{partition_id}_{zone_id}"
 
     @property
     def available(self) -> bool:
         """Check if device is reporting online from api."""
-        return bool(self.data["isOnline"])
+        return super().available and bool(self.data.is_online)
+
+    @property
+    def zone_data(self) -> HyypZone:
+        """Return zone coordinator data for this entity."""
+        return self.coordinator.data.zones[
+            (self._site_id, self._partition_id, self._zone_id)
+        ]
 
     @property
     def is_on(self) -> bool:
         """Return the state of the switch."""
-        return not self.partition_data["zones"][self._zone_id]["bypassed"]
+        return not self.zone_data.bypassed
 
     async def async_turn_on(self, **kwargs: Any) -> None:
         """Turn the switch entity on."""
         try:
-            update_ok = await self.hass.async_add_executor_job(
-                self.coordinator.hyyp_client.set_zone_bypass,
-                self._zone_id,
-                self._partition_id,
-                0,
-                self._bypass_code,
+            update_ok = await self.coordinator.async_send_command(
+                self._site_id,
+                partial(
+                    self.coordinator.hyyp_client.set_zone_bypass,
+                    self._zone_id,
+                    self._partition_id,
+                    0,
+                    self.coordinator.bypass_code,
+                ),
             )
 
+        except HyypCircuitOpenError:
+            raise
+
         except (HTTPError, HyypApiError) as err:
             raise HyypApiError(f"Failed to turn on switch {self._attr_name}") from err
 
         if update_ok["status"] == "SUCCESS":
-            await self.coordinator.async_request_refresh()
+            self.coordinator.async_expect_zone(
+                self._site_id, self._partition_id, self._zone_id, bypassed=False
+            )
 
         elif update_ok["status"] == "PENDING":
             raise HyypApiError(f"Code required to bypass zone {self._attr_name}")
@@ -104,19 +122,27 @@ class HyypSwitch(HyypPartitionEntity, SwitchEntity):
     async def async_turn_off(self, **kwargs: Any) -> None:
         """Turn the switch entity off."""
         try:
-            update_ok = await self.hass.async_add_executor_job(
-                self.coordinator.hyyp_client.set_zone_bypass,
-                self._zone_id,
-                self._partition_id,
-                0,
-                self._bypass_code,
+            update_ok = await self.coordinator.async_send_command(
+                self._site_id,
+                partial(
+                    self.coordinator.hyyp_client.set_zone_bypass,
+                    self._zone_id,
+                    self._partition_id,
+                    0,
+                    self.coordinator.bypass_code,
+                ),
             )
 
+        except HyypCircuitOpenError:
+            raise
+
         except (HTTPError, HyypApiError) as err:
-            raise HyypApiError("Failed to turn on switch {self._attr_name}") from err
+            raise HyypApiError(f"Failed to turn on switch {self._attr_name}") from err
 
         if update_ok["status"] == "SUCCESS":
-            await self.coordinator.async_request_refresh()
+            self.coordinator.async_expect_zone(
+                self._site_id, self._partition_id, self._zone_id, bypassed=True
+            )
 
         elif update_ok["status"] == "PENDING":
             raise HyypApiError(f"Code required to bypass zone {self._attr_name}")
@@ -129,19 +155,30 @@ class HyypSwitch(HyypPartitionEntity, SwitchEntity):
     async def perform_zone_bypass_code(self, code: Any = None) -> None:
         """Service to bypass zone if code is not set in options."""
         try:
-            update_ok = await self.hass.async_add_executor_job(
-                self.coordinator.hyyp_client.set_zone_bypass,
-                self._zone_id,
-                self._partition_id,
-                0,
-                code,
+            update_ok = await self.coordinator.async_send_command(
+                self._site_id,
+                partial(
+                    self.coordinator.hyyp_client.set_zone_bypass,
+                    self._zone_id,
+                    self._partition_id,
+                    0,
+                    code,
+                ),
             )
 
+        except HyypCircuitOpenError:
+            raise
+
         except (HTTPError, HyypApiError) as err:
             raise HyypApiError(f"Failed to turn on switch {self._attr_name}") from err
 
         if update_ok["status"] == "SUCCESS":
-            await self.coordinator.async_request_refresh()
+            self.coordinator.async_expect_zone(
+                self._site_id,
+                self._partition_id,
+                self._zone_id,
+                bypassed=not self.zone_data.bypassed,
+            )
 
         else:
             raise HyypApiError(
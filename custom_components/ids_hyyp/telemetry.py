@@ -0,0 +1,152 @@
+"""Api and update cycle telemetry of an IDS Hyyp config entry."""
+from __future__ import annotations
+
+import asyncio
+from bisect import bisect_left
+from typing import Any
+
+# Upper bounds in seconds of the latency histogram buckets, the last bucket
+# holds everything slower.
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 25.0)
+
+OPERATION_REFRESH = "refresh"
+
+
+def error_type(err: BaseException) -> str:
+    """Return the name failures of err are counted under."""
+    if isinstance(err, asyncio.TimeoutError):
+        return "TimeoutError"
+    return type(err).__name__
+
+
+def endpoint_operation(endpoint: str) -> str:
+    """Return the operation name of an api endpoint."""
+    return endpoint.rsplit("/", 1)[-1]
+
+
+class LatencyHistogram:
+    """Count of durations per latency bucket."""
+
+    __slots__ = ("buckets", "count", "total", "max")
+
+    def __init__(self) -> None:
+        """Initialize an empty histogram."""
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds: float) -> None:
+        """Record one duration."""
+        self.buckets[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def quantile(self, fraction: float) -> float | None:
+        """Return the bucket bound below which fraction of durations fall.
+
+        Durations beyond the last bound are reported as the slowest seen.
+        """
+        if not self.count:
+            return None
+
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS, self.buckets):
+            seen += count
+            if seen >= fraction * self.count:
+                return min(bound, self.max)
+
+        return self.max
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the histogram for diagnostics."""
+        buckets = {
+            f"le_{bound:g}": count
+            for bound, count in zip(LATENCY_BUCKETS, self.buckets)
+        }
+        buckets["slower"] = self.buckets[-1]
+
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else None,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "max": self.max,
+            "buckets": buckets,
+        }
+
+
+class HyypTelemetry:
+    """Latency, failure, payload and fan-out statistics since setup.
+
+    Api requests are recorded by the client per endpoint, refreshes and
+    listener fan-out by the coordinator.
+    """
+
+    def __init__(self) -> None:
+        """Initialize empty statistics."""
+        self.latency: dict[str, LatencyHistogram] = {}
+        self.requests = LatencyHistogram()
+        self.failures: dict[str, dict[str, int]] = {}
+        self.bytes_received = 0
+        self.last_refresh: float | None = None
+        self.last_payload: int | None = None
+        self.last_notified: int | None = None
+        self.last_state_write: float | None = None
+
+    @property
+    def request_failures(self) -> dict[str, int]:
+        """Return the number of failed api requests per error type."""
+        totals: dict[str, int] = {}
+        for operation, types in self.failures.items():
+            if operation == OPERATION_REFRESH:
+                continue
+            for name, count in types.items():
+                totals[name] = totals.get(name, 0) + count
+        return totals
+
+    def _time(self, operation: str, seconds: float) -> None:
+        """Record the duration of an operation."""
+        if (histogram := self.latency.get(operation)) is None:
+            histogram = self.latency[operation] = LatencyHistogram()
+        histogram.add(seconds)
+
+    def request_done(self, endpoint: str, seconds: float, size: int) -> None:
+        """Record an api request that returned a body of size bytes."""
+        self._time(endpoint_operation(endpoint), seconds)
+        self.requests.add(seconds)
+        self.bytes_received += size
+
+    def failed(self, operation: str, err: BaseException) -> None:
+        """Count a failed operation or api request."""
+        types = self.failures.setdefault(endpoint_operation(operation), {})
+        name = error_type(err)
+        types[name] = types.get(name, 0) + 1
+
+    def refresh_done(self, seconds: float, payload: int) -> None:
+        """Record a successful refresh that received payload bytes."""
+        self._time(OPERATION_REFRESH, seconds)
+        self.last_refresh = seconds
+        self.last_payload = payload
+
+    def listeners_updated(self, notified: int, seconds: float) -> None:
+        """Record a listener fan-out and the time its state writes took."""
+        self.last_notified = notified
+        self.last_state_write = seconds
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the statistics for diagnostics."""
+        return {
+            "latency": {
+                operation: histogram.as_dict()
+                for operation, histogram in self.latency.items()
+            },
+            "requests": self.requests.as_dict(),
+            "failures": self.failures,
+            "bytes_received": self.bytes_received,
+            "last_refresh": self.last_refresh,
+            "last_payload": self.last_payload,
+            "last_notified": self.last_notified,
+            "last_state_write": self.last_state_write,
+        }
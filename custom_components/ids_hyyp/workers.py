@@ -0,0 +1,91 @@
+"""Bounded worker threads for the blocking work of an IDS Hyyp config entry."""
+from __future__ import annotations
+
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, TypeVar
+
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+
+from .const import DOMAIN, WORKER_QUEUE_DEPTH, WORKERS
+
+_T = TypeVar("_T")
+
+
+class HyypWorkerPoolFullError(HomeAssistantError):
+    """Blocking job refused because the worker queue is full."""
+
+
+class HyypWorkerPool:
+    """Small thread pool that keeps blocking jobs off the shared executor.
+
+    At most workers jobs run at a time and max_queued more may wait, further
+    jobs are refused. A slow disk then only delays this integration.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        name: str,
+        workers: int = WORKERS,
+        max_queued: int = WORKER_QUEUE_DEPTH,
+    ) -> None:
+        """Initialize the pool, threads start on demand."""
+        self._hass = hass
+        self._executor = ThreadPoolExecutor(
+            workers, thread_name_prefix=f"{DOMAIN}_{name}"
+        )
+        self.workers = workers
+        self.max_queued = max_queued
+        self.pending = 0
+        self.peak_pending = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self._shut_down = False
+
+    async def async_run(self, target: Callable[..., _T], *args: Any) -> _T:
+        """Run target in the pool and return its result."""
+        if self._shut_down:
+            raise HomeAssistantError("IDS Hyyp worker pool is shut down")
+
+        if self.pending >= self.workers + self.max_queued:
+            self.rejected += 1
+            raise HyypWorkerPoolFullError(
+                f"{self.pending} IDS Hyyp jobs pending, refusing "
+                f"{getattr(target, '__name__', target)}"
+            )
+
+        self.pending += 1
+        self.peak_pending = max(self.peak_pending, self.pending)
+
+        try:
+            result = await self._hass.loop.run_in_executor(
+                self._executor, target, *args
+            )
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.pending -= 1
+
+        self.completed += 1
+        return result
+
+    def shutdown(self) -> None:
+        """Refuse new jobs, threads exit once the pending jobs are done."""
+        self._shut_down = True
+        self._executor.shutdown(wait=False)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the pool metrics for diagnostics."""
+        return {
+            "workers": self.workers,
+            "max_queued": self.max_queued,
+            "pending": self.pending,
+            "peak_pending": self.peak_pending,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+        }